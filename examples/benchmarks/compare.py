@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Compares two results files of `benchmarks.run`, exits with status 1 when
+some benchmark is slower than `--threshold` percents
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+
+
+# metric of each kind and whether bigger value is better
+METRICS = {
+    'route': (('rps', True), ('p99_ms', False), ('queries', False)),
+    'loop': (('ops_per_sec', True), ),
+}
+
+
+def load(path):
+    with open(path) as source:
+        data = json.load(source)
+    return data['meta'], {result['name']: result for result in data['results']}
+
+
+def change(base, head, bigger_is_better):
+    """Relative regression in percents, negative for improvement"""
+    if not base:
+        return 0.0
+    delta = (head - base) / float(base) * 100
+    return -delta if bigger_is_better else delta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='allowed slowdown in percents')
+    args = parser.parse_args(argv)
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print('{} -> {}'.format(base_meta.get('commit'), head_meta.get('commit')))
+
+    regressions = 0
+    for name in sorted(set(base) & set(head)):
+        for metric, bigger_is_better in METRICS[head[name]['kind']]:
+            if metric not in base[name]:
+                continue
+            percent = change(base[name][metric], head[name][metric], bigger_is_better)
+            if metric == 'queries':
+                # any additional query is regression
+                regressed = head[name][metric] > base[name][metric]
+            else:
+                regressed = percent > args.threshold
+            regressions += regressed
+            print('{:<3} {:<36} {:<12} {:>12.2f} {:>12.2f} {:>+8.1f}%'.format(
+                '!!' if regressed else '', name, metric,
+                base[name][metric], head[name][metric], percent))
+
+    for name in sorted(set(base) ^ set(head)):
+        print('    {:<36} only in {}'.format(name, 'base' if name in base else 'head'))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Throughput of the example project under concurrent clients
+
+    cd examples
+    python -m benchmarks.concurrency --rows 10000 --concurrency 1 4 16 --output concurrency.json
+
+Views are served by threaded WSGI server in the same process, every client
+thread keeps its own connection. Results have `benchmarks.run` format and
+can be compared with `benchmarks.compare`.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import threading
+import urllib2
+from SocketServer import ThreadingMixIn
+from timeit import default_timer as timer
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import run
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, choices=run.ROWS, default=run.ROWS[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16],
+                        help='client threads counts')
+    parser.add_argument('--requests', type=int, default=400,
+                        help='timed requests per route and concurrency')
+    parser.add_argument('--db', help='sqlite database path')
+    parser.add_argument('--output', default='-')
+    parser.set_defaults(loops=None)
+    return parser.parse_args(argv)
+
+
+def start_server():
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def get_session_cookie():
+    from django.conf import settings
+    from django.test import Client
+
+    client = Client()
+    assert client.login(username='admin', password='password')
+    return '{}={}'.format(settings.SESSION_COOKIE_NAME,
+                          client.cookies[settings.SESSION_COOKIE_NAME].value)
+
+
+def measure(name, url, headers, concurrency, requests):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_client = max(1, requests // concurrency)
+
+    def client():
+        opener = urllib2.build_opener()
+        opener.addheaders = headers
+        for _ in range(per_client):
+            start = timer()
+            try:
+                opener.open(url).read()
+            except (urllib2.URLError, IOError) as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies.append(timer() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = timer() - started
+    assert latencies, errors[:1]
+
+    return {
+        'name': '{}:c{}'.format(name, concurrency),
+        'kind': 'route',
+        'path': url,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': run.percentile(latencies, 50) * 1000,
+        'p99_ms': run.percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    run.setup(args)
+    run.seed(args.rows)
+
+    from django.contrib.auth.models import User
+
+    server = start_server()
+    base_url = 'http://127.0.0.1:{}'.format(server.server_port)
+    user_pk = User.objects.get(username='user{}'.format(args.rows // 2)).pk
+    cookie = ('Cookie', get_session_cookie())
+    as_json = ('Accept', 'application/json')
+    routes = (
+        ('user:list', '/users/', [cookie]),
+        ('user:list:json', '/users/', [cookie, as_json]),
+        ('user:detail', '/users/{}/'.format(user_pk), [cookie]),
+        ('user:detail:json', '/users/{}/'.format(user_pk), [cookie, as_json]),
+    )
+
+    results = []
+    for name, path, headers in routes:
+        for concurrency in args.concurrency:
+            result = measure(name, base_url + path, headers, concurrency, args.requests)
+            run.log(run.format_result(dict(result, queries='-')))
+            results.append(result)
+    server.shutdown()
+
+    meta = dict(run.get_meta(args), concurrency=args.concurrency, server='wsgiref threads')
+    data = json.dumps({'meta': meta, 'results': results}, indent=2, sort_keys=True)
+    if args.output == '-':
+        print(data)
+    else:
+        with open(args.output, 'w') as output:
+            output.write(data)
+
+
+if __name__ == '__main__':
+    main()
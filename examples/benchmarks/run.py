@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Benchmarks of viewsets request path on the example project
+
+    cd examples
+    python -m benchmarks.run --rows 10000 --output base.json
+    python -m benchmarks.run --rows 10000 --output head.json
+    python -m benchmarks.compare base.json head.json
+
+Seeded databases are kept as `benchmark-<rows>.sqlite3` and reused.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from timeit import default_timer as timer
+
+
+ROWS = (10000, 100000, 1000000)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, choices=ROWS, default=ROWS[0],
+                        help='seeded users count')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='untimed requests per route')
+    parser.add_argument('--loops', type=int, default=10000,
+                        help='iterations of hot spot loops')
+    parser.add_argument('--db', help='sqlite database path')
+    parser.add_argument('--output', default='-',
+                        help='JSON results file, "-" for stdout')
+    return parser.parse_args(argv)
+
+
+def setup(args):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DB'] = args.db or os.path.join(
+        BASE_DIR, 'benchmark-{}.sqlite3'.format(args.rows))
+    sys.path.insert(0, BASE_DIR)
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+
+
+# data
+
+def seed(rows, batch_size=5000):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import Group, Permission, User
+    from django.db import transaction
+
+    if User.objects.filter(username__startswith='user').count() >= rows:
+        return
+
+    log('seeding {} users'.format(rows))
+    password = make_password('password')
+    with transaction.atomic():
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        Group.objects.bulk_create(Group(name='group{}'.format(i))
+                                  for i in range(max(1, rows // 100)))
+        group_pks = list(Group.objects.values_list('pk', flat=True))
+
+        for start in range(0, rows, batch_size):
+            User.objects.bulk_create(
+                User(username='user{}'.format(i),
+                     email='user{}@example.com'.format(i),
+                     first_name='First{}'.format(i),
+                     last_name='Last{}'.format(i),
+                     password=password)
+                for i in range(start, min(start + batch_size, rows)))
+
+        Membership = User.groups.through
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        for index, user_pk in enumerate(users.iterator()):
+            batch.append(Membership(user_id=user_pk,
+                                    group_id=group_pks[index % len(group_pks)]))
+            if len(batch) >= batch_size:
+                Membership.objects.bulk_create(batch)
+                batch = []
+        Membership.objects.bulk_create(batch)
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        staff = User.objects.create_user('staff', 'staff@example.com', 'password')
+        editors = Group.objects.create(name='editors')
+        editors.permissions = Permission.objects.filter(content_type__app_label='auth',
+                                                        codename__endswith='_user')
+        staff.groups.add(editors)
+
+
+# measurements
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+def measure_route(client, name, path, requests, warmup, **extra):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        client.get(path, **extra)
+    # queries are captured apart, capturing slows timed requests down
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(path, **extra)
+    assert response.status_code == 200, (path, response.status_code)
+    # next request resets queries log
+    queries = len(context.captured_queries)
+
+    latencies = []
+    for _ in range(requests):
+        start = timer()
+        client.get(path, **extra)
+        latencies.append(timer() - start)
+
+    return {
+        'name': name,
+        'kind': 'route',
+        'path': path,
+        'requests': requests,
+        'rps': requests / sum(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'queries': queries,
+    }
+
+
+def measure_loop(name, func, loops, items=1):
+    """`func` is called `loops` times and processes `items` objects per call"""
+    func()
+    start = timer()
+    for _ in range(loops):
+        func()
+    elapsed = timer() - start
+    return {
+        'name': name,
+        'kind': 'loop',
+        'loops': loops,
+        'ops_per_sec': loops * items / elapsed,
+        'mean_us': elapsed / loops * 1000000,
+    }
+
+
+def get_viewsets():
+    from django.core.urlresolvers import get_resolver
+    from viewsets.checks import iterate_viewsets
+
+    return {viewset.model_options.model_name: viewset
+            for viewset in iterate_viewsets(get_resolver(None).url_patterns)}
+
+
+def bench_routes(args):
+    from django.contrib.auth.models import Group, User
+    from django.test import Client
+
+    client = Client()
+    assert client.login(username='admin', password='password')
+    user_pk = User.objects.get(username='user{}'.format(args.rows // 2)).pk
+    group_pk = Group.objects.order_by('pk').values_list('pk', flat=True)[0]
+    as_json = {'HTTP_ACCEPT': 'application/json'}
+
+    routes = (
+        ('user:list', '/users/', {}),
+        ('user:list:json', '/users/', as_json),
+        ('user:detail', '/users/{}/'.format(user_pk), {}),
+        ('user:detail:json', '/users/{}/'.format(user_pk), as_json),
+        ('user:add', '/users/add/', {}),
+        ('user:edit', '/users/{}/edit/'.format(user_pk), {}),
+        ('user:delete', '/users/{}/delete/'.format(user_pk), {}),
+        ('group:list', '/groups/', {}),
+        ('group:detail', '/groups/{}/'.format(group_pk), {}),
+    )
+    for name, path, extra in routes:
+        yield measure_route(client, name, path, args.requests, args.warmup, **extra)
+
+
+def bench_hot_spots(args):
+    from django.contrib.auth.models import AnonymousUser, User
+    from django.test import RequestFactory
+    from viewsets import helpers
+    from viewsets.templatetags import viewsets_tags
+    from users.urls import UserViewset
+
+    viewset = get_viewsets()['user']
+    objects = list(viewset.get_serialize_queryset()[:100])
+    obj = objects[0]
+    plan = viewset.get_list_plan()
+    loops = args.loops
+
+    yield measure_loop('serialize_object', lambda: viewset.serialize_object(obj), loops)
+    yield measure_loop('serialize_many:100', lambda: list(viewset.serialize_many(objects, plan)),
+                       max(1, loops // 100), items=len(objects))
+
+    factory = RequestFactory()
+    staff = User.objects.get(username='staff')
+
+    def make_context(user):
+        request = factory.get('/users/')
+        request.user = user
+        request.session = {}
+        return {'request': request, 'viewset': viewset}
+
+    # permission checkers are memoized per request, so both cases are measured
+    context = make_context(staff)
+    yield measure_loop('viewset_has_permission:request',
+                       lambda: viewsets_tags.viewset_has_permission(context, 'edit', obj),
+                       loops)
+    contexts = [make_context(User.objects.get(pk=staff.pk)) for _ in range(min(loops, 1000))]
+    iterator = iter(contexts * (loops // len(contexts) + 2))
+    yield measure_loop('viewset_has_permission:new_request',
+                       lambda: viewsets_tags.viewset_has_permission(next(iterator), 'edit', obj),
+                       loops)
+    anonymous = make_context(AnonymousUser())
+    yield measure_loop('viewset_has_permission:anonymous',
+                       lambda: viewsets_tags.viewset_has_permission(anonymous, 'list'),
+                       loops)
+
+    yield measure_loop('viewset_reverse',
+                       lambda: viewsets_tags.viewset_reverse(context, 'detail', pk=obj.pk),
+                       loops)
+
+    def boot():
+        helpers._mixins_cache.clear()
+        UserViewset().collect_urls()
+    yield measure_loop('boot:cold', boot, max(1, loops // 100))
+    yield measure_loop('boot:warm', lambda: UserViewset().collect_urls(), max(1, loops // 100))
+
+
+# report
+
+def get_meta(args):
+    import django
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'rows': args.rows,
+        'requests': args.requests,
+        'loops': args.loops,
+    }
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def format_result(result):
+    if result['kind'] == 'route':
+        return '{name:<36} {rps:>9.1f} rps  p50 {p50_ms:>8.2f} ms  p99 {p99_ms:>8.2f} ms  ' \
+               '{queries:>3} queries'.format(**result)
+    return '{name:<36} {ops_per_sec:>12.0f} ops/s  {mean_us:>10.2f} us'.format(**result)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup(args)
+    seed(args.rows)
+
+    results = []
+    for result in bench_routes(args):
+        log(format_result(result))
+        results.append(result)
+    for result in bench_hot_spots(args):
+        log(format_result(result))
+        results.append(result)
+
+    data = json.dumps({'meta': get_meta(args), 'results': results}, indent=2, sort_keys=True)
+    if args.output == '-':
+        print(data)
+    else:
+        with open(args.output, 'w') as output:
+            output.write(data)
+
+
+if __name__ == '__main__':
+    main()
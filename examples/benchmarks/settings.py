@@ -0,0 +1,30 @@
+import os
+
+from project.settings import *  # noqa
+
+
+# development tools change timings of every request
+INSTALLED_APPS = tuple(app
+                       for app in INSTALLED_APPS
+                       if app not in ('debug_toolbar', 'django_extensions'))
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DB', os.path.join(BASE_DIR, 'benchmark.sqlite3')),
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = (
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+)
@@ -0,0 +1,119 @@
+# encoding: utf-8
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import resolve
+from django.db import connection
+from django.test import RequestFactory, TestCase
+
+from users.urls import UserViewset
+from viewsets import cache, pagination
+
+
+class ViewStub(object):
+    def __init__(self, path='/users/', **params):
+        self.request = RequestFactory().get(path, params)
+        self.request.resolver_match = resolve(path)
+        self.viewset = UserViewset()
+
+
+class CounterTestCase(TestCase):
+    rows = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username='user{}'.format(i), is_staff=i % 3 == 0)
+                                 for i in range(cls.rows))
+
+    def setUp(self):
+        cache.get_cache().clear()
+
+
+class ExactCounterTestCase(CounterTestCase):
+    def test_count(self):
+        counter = pagination.ExactCounter()
+        with self.assertNumQueries(1):
+            self.assertEqual(counter.count(ViewStub(), User.objects.all()), self.rows)
+        self.assertFalse(counter.is_approximate(self.rows))
+
+    def test_filtered(self):
+        counter = pagination.ExactCounter()
+        queryset = User.objects.filter(is_staff=True)
+        self.assertEqual(counter.count(ViewStub(), queryset), 10)
+
+
+class CachedCounterTestCase(CounterTestCase):
+    def test_cached(self):
+        counter = pagination.CachedCounter()
+        view = ViewStub()
+        self.assertEqual(counter.count(view, User.objects.all()), self.rows)
+        User.objects.create(username='extra')
+        with self.assertNumQueries(0):
+            self.assertEqual(counter.count(view, User.objects.all()), self.rows)
+        self.assertFalse(counter.is_approximate(self.rows))
+
+    def test_key_changes_with_filters(self):
+        counter = pagination.CachedCounter()
+        self.assertEqual(counter.count(ViewStub(), User.objects.all()), self.rows)
+        with self.assertNumQueries(1):
+            count = counter.count(ViewStub(is_staff='True'), User.objects.filter(is_staff=True))
+        self.assertEqual(count, 10)
+
+    def test_key_changes_with_queryset(self):
+        counter = pagination.CachedCounter()
+        view = ViewStub()
+        self.assertEqual(counter.count(view, User.objects.all()), self.rows)
+        # same parameters, e.g. permission filtered queryset of other user
+        self.assertEqual(counter.count(view, User.objects.filter(is_staff=True)), 10)
+
+    def test_key_ignores_page(self):
+        counter = pagination.CachedCounter()
+        counter.count(ViewStub(), User.objects.all())
+        with self.assertNumQueries(0):
+            counter.count(ViewStub(page='2'), User.objects.all())
+        self.assertNotEqual(counter.get_cache_key(ViewStub(), User.objects.all()),
+                            counter.get_cache_key(ViewStub(q='user'), User.objects.all()))
+
+    def test_empty_result(self):
+        counter = pagination.CachedCounter()
+        self.assertEqual(counter.count(ViewStub(), User.objects.filter(pk__in=[])), 0)
+
+
+class ApproximateCounterTestCase(CounterTestCase):
+    def test_below_cap(self):
+        counter = pagination.ApproximateCounter(cap=100)
+        with self.assertNumQueries(1):
+            self.assertEqual(counter.count(ViewStub(), User.objects.all()), self.rows)
+        self.assertFalse(counter.is_approximate(self.rows))
+
+    def test_filtered_above_cap(self):
+        counter = pagination.ApproximateCounter(cap=5)
+        count = counter.count(ViewStub(), User.objects.filter(is_staff=True))
+        self.assertEqual(count, 6)
+        self.assertTrue(counter.is_approximate(count))
+
+    def test_without_statistics(self):
+        counter = pagination.ApproximateCounter(cap=5)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('DELETE FROM sqlite_stat1')
+        self.assertIsNone(counter.estimate(User.objects.all()))
+        self.assertEqual(counter.count(ViewStub(), User.objects.all()), 6)
+
+    def test_sqlite_statistics(self):
+        counter = pagination.ApproximateCounter(cap=5)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(counter.estimate(User.objects.all()), self.rows)
+        count = counter.count(ViewStub(), User.objects.all())
+        self.assertEqual(count, self.rows)
+        self.assertTrue(counter.is_approximate(count))
+
+    def test_paginator(self):
+        paginator = pagination.CountedPaginator(User.objects.order_by('pk'), 10,
+                                                counter=pagination.ApproximateCounter(cap=5),
+                                                view=ViewStub())
+        self.assertTrue(paginator.is_approximate)
+        page = paginator.page(3)
+        self.assertEqual(len(page.object_list), 10)
+        self.assertFalse(page.has_next())
@@ -0,0 +1,74 @@
+# encoding: utf-8
+
+from django.core.urlresolvers import (NoReverseMatch, get_resolver, get_script_prefix, get_urlconf,
+                                      reverse, set_script_prefix)
+from django.test import SimpleTestCase
+from django.utils.regex_helper import normalize
+
+from viewsets import checks
+
+
+class URLBuilderTestCase(SimpleTestCase):
+    def setUp(self):
+        self.viewsets = list(checks.iterate_viewsets(get_resolver(None).url_patterns))
+        self.assertTrue(self.viewsets)
+
+    def iterate_routes(self):
+        for viewset in self.viewsets:
+            for name, route in viewset.routes.items():
+                (format, params), = normalize(route.pattern.regex.pattern)
+                args = [str(42 + index) for index in range(len(params))]
+                yield viewset, name, args
+
+    def assertMatchesReverse(self):
+        count = 0
+        for viewset, name, args in self.iterate_routes():
+            self.assertEqual(viewset.build_url(name, *args),
+                             reverse(viewset.get_route_name(name), args=args))
+            count += 1
+        return count
+
+    def test_all_routes(self):
+        self.assertTrue(self.assertMatchesReverse())
+        for viewset in self.viewsets:
+            # every route of example project has precompiled builder
+            self.assertEqual(set(viewset.get_url_builders()), set(viewset.routes))
+
+    def test_script_prefix(self):
+        prefix = get_script_prefix()
+        set_script_prefix('/app/')
+        try:
+            self.assertMatchesReverse()
+            viewset = self.viewsets[0]
+            self.assertTrue(viewset.build_url('list').startswith('/app/'))
+        finally:
+            set_script_prefix(prefix)
+
+    def test_invalid_args(self):
+        viewset = self.viewsets[0]
+        with self.assertRaises(NoReverseMatch):
+            viewset.build_url('detail', 'abc')
+        with self.assertRaises(NoReverseMatch):
+            viewset.build_url('detail')
+        with self.assertRaises(NoReverseMatch):
+            viewset.build_url('detail', 1, 2)
+        with self.assertRaises(NoReverseMatch):
+            viewset.build_url('list', 1)
+        with self.assertRaises(NoReverseMatch):
+            viewset.build_url('missing')
+        with self.assertRaises(ValueError):
+            viewset.build_url('detail', 1, pk=2)
+
+    def test_fallback_to_reverse(self):
+        viewset = self.viewsets[0]
+        builders = viewset.__dict__.setdefault('_url_builders', {})
+        compiled = builders.get(get_urlconf())
+        builders[get_urlconf()] = {}
+        try:
+            self.assertEqual(viewset.build_url('detail', 42),
+                             reverse(viewset.get_route_name('detail'), args=[42]))
+        finally:
+            if compiled is None:
+                builders.pop(get_urlconf())
+            else:
+                builders[get_urlconf()] = compiled
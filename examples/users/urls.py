@@ -1,9 +1,9 @@
 # encoding: utf-8
 
-from django.conf.urls import url
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from viewsets import generic, permissions
+from viewsets.viewset import ViewSetRouter
 
 
 class UserViewset(generic.ModelViewSet):
@@ -19,6 +19,9 @@ class PermissionViewset(generic.ModelViewSet):
     model = Permission
 
 
-urlpatterns = [url('^users/', UserViewset().urls),
-               url('^groups/', GroupViewset().urls),
-               url('^permissions/', PermissionViewset().urls), ]
+router = ViewSetRouter()
+router.register('users', UserViewset)
+router.register('groups', GroupViewset)
+router.register('permissions', PermissionViewset)
+
+urlpatterns = router.urls
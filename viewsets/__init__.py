@@ -1,3 +1,5 @@
 # encoding: utf-8
 
 __version__ = '0.0.2'
+
+default_app_config = 'viewsets.apps.ViewSetsConfig'
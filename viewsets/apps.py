@@ -0,0 +1,22 @@
+# encoding: utf-8
+
+from django.apps import AppConfig, apps
+from django.core.signals import setting_changed
+
+
+class ViewSetsConfig(AppConfig):
+    name = 'viewsets'
+
+    def ready(self):
+        from viewsets import checks  # noqa
+        from viewsets import helpers
+
+        setting_changed.connect(helpers.clear_templates_cache,
+                                dispatch_uid='viewsets_clear_templates_cache')
+        if helpers.autoreload_signals_available():
+            from django.utils.autoreload import file_changed
+            file_changed.connect(helpers.clear_templates_cache,
+                                 dispatch_uid='viewsets_clear_templates_cache')
+
+        if apps.is_installed('django.contrib.auth'):
+            from viewsets import receivers  # noqa
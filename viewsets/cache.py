@@ -0,0 +1,151 @@
+# encoding: utf-8
+
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db.models import signals
+from django.utils.encoding import force_bytes
+
+
+CACHE_ALIAS = 'default'
+PERMISSIONS_TIMEOUT = 60 * 5
+PERMISSIONS_VERSION_KEY = 'viewsets:permissions:version'
+PERMISSIONS_KEY = 'viewsets:permissions:{version}:{pk}'
+COUNT_KEY = 'viewsets:count:{namespace}:{model}:{digest}'
+MODEL_VERSION_KEY = 'viewsets:version:{model}'
+OBJECT_VERSION_KEY = 'viewsets:version:{model}:{pk}'
+FRAGMENT_KEY = 'viewsets:fragment:{name}:{digest}'
+FRAGMENT_TIMEOUT = 60 * 10
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+# user permissions set
+
+def get_permissions_version():
+    cache = get_cache()
+    version = cache.get(PERMISSIONS_VERSION_KEY)
+    if version is None:
+        cache.add(PERMISSIONS_VERSION_KEY, _new_version(), None)
+        version = cache.get(PERMISSIONS_VERSION_KEY, 0)
+    return version
+
+
+def get_user_permissions(user):
+    """
+    Effective permissions set of `user` (as `user.get_all_permissions()`)
+    shared between processes through the cache framework
+    """
+    if not user.pk:
+        return user.get_all_permissions()
+
+    memo = getattr(user, '_viewsets_permissions', None)
+    if memo is not None:
+        return memo
+
+    cache = get_cache()
+    key = PERMISSIONS_KEY.format(version=get_permissions_version(), pk=user.pk)
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = frozenset(user.get_all_permissions())
+        cache.set(key, permissions, PERMISSIONS_TIMEOUT)
+
+    user._viewsets_permissions = permissions
+    return permissions
+
+
+def invalidate_user_permissions(pk):
+    key = PERMISSIONS_KEY.format(version=get_permissions_version(), pk=pk)
+    get_cache().delete(key)
+
+
+def invalidate_permissions():
+    """Drops cached permissions of all users"""
+    _bump(PERMISSIONS_VERSION_KEY)
+
+
+# rendered fragments
+
+def get_model_label(model):
+    opts = model._meta
+    return '{}.{}'.format(opts.app_label, opts.model_name)
+
+
+def get_fragment_key(name, model, pk, *parts):
+    """
+    Key of object fragment, it changes with model and object version tokens
+    and with any of `parts` (permission fingerprint, language etc.)
+    """
+    label = get_model_label(model)
+    version_keys = [MODEL_VERSION_KEY.format(model=label),
+                    OBJECT_VERSION_KEY.format(model=label, pk=pk)]
+    versions = get_cache().get_many(version_keys)
+    digest = hashlib.md5(force_bytes(repr((
+        label,
+        pk,
+        [versions.get(key) for key in version_keys],
+        parts,
+    )))).hexdigest()
+    return FRAGMENT_KEY.format(name=name, digest=digest)
+
+
+def get_fragment(key, render, timeout=FRAGMENT_TIMEOUT):
+    cache = get_cache()
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment, timeout)
+    return fragment
+
+
+def invalidate_object(model, pk):
+    _bump(OBJECT_VERSION_KEY.format(model=get_model_label(model), pk=pk))
+
+
+def invalidate_model(model):
+    _bump(MODEL_VERSION_KEY.format(model=get_model_label(model)))
+
+
+def connect_fragments_invalidation(model):
+    """Invalidates `model` fragments on its changes, safe to call repeatedly"""
+    label = get_model_label(model)
+    signals.post_save.connect(_invalidate_object_receiver, sender=model,
+                              dispatch_uid='viewsets_fragments_save_{}'.format(label))
+    signals.post_delete.connect(_invalidate_object_receiver, sender=model,
+                                dispatch_uid='viewsets_fragments_delete_{}'.format(label))
+    for field in model._meta.many_to_many:
+        signals.m2m_changed.connect(_invalidate_m2m_receiver, sender=field.rel.through,
+                                    dispatch_uid='viewsets_fragments_m2m_{}_{}'.format(label, field.name))
+
+
+def _invalidate_object_receiver(sender, instance, **kwargs):
+    invalidate_object(sender, instance.pk)
+
+
+def _invalidate_m2m_receiver(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_object(type(instance), instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            invalidate_object(model, pk)
+    else:
+        # reverse `clear()` doesn't report affected objects
+        invalidate_model(model)
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def _new_version():
+    # evicted counter must not resurrect stale entries of previous versions
+    return int(time.time() * 1000)
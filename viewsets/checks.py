@@ -0,0 +1,28 @@
+# encoding: utf-8
+
+from django.core import checks
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+
+
+def iterate_viewsets(patterns):
+    """Distinct viewsets of routes in `patterns` and nested resolvers"""
+    seen = set()
+    for pattern in patterns:
+        if isinstance(pattern, RegexURLResolver):
+            viewsets = iterate_viewsets(pattern.url_patterns)
+        else:
+            viewset = getattr(pattern, 'view_kwargs', {}).get('viewset')
+            viewsets = [viewset] if viewset is not None else []
+        for viewset in viewsets:
+            if id(viewset) not in seen:
+                seen.add(id(viewset))
+                yield viewset
+
+
+@checks.register('viewsets')
+def check_filter_indexes(app_configs, **kwargs):
+    errors = []
+    for viewset in iterate_viewsets(get_resolver(None).url_patterns):
+        if hasattr(viewset, 'check_filter_indexes'):
+            errors.extend(viewset.check_filter_indexes())
+    return errors
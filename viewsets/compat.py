@@ -1,25 +1,45 @@
 # encoding: utf-8
 
-try:
-    import crispy_forms
-    from crispy_forms.templatetags.crispy_forms_filters import as_crispy_form
-except ImportError:
-    crispy_forms = None
-    as_crispy_form = None
-
-try:
-    import django_filters
-except ImportError:
-    django_filters = None
-
-try:
-    import braces.views as braces
-except ImportError:
-    braces = None
-
-
-if braces:
-    MessagesMixin = braces.MessageMixin
-else:
-    class MessagesMixin(object):
-        messages = None
+from importlib import import_module
+
+
+_modules = {}
+
+
+def lazy_import(name):
+    """
+    Imports optional module `name` on first call instead of module import,
+    returns `None` when it isn't installed
+    """
+    if name not in _modules:
+        try:
+            _modules[name] = import_module(name)
+        except ImportError:
+            _modules[name] = None
+    return _modules[name]
+
+
+def get_crispy_forms():
+    return lazy_import('crispy_forms')
+
+
+def get_as_crispy_form():
+    filters = lazy_import('crispy_forms.templatetags.crispy_forms_filters')
+    return filters and filters.as_crispy_form
+
+
+def get_django_filters():
+    return lazy_import('django_filters')
+
+
+def get_braces():
+    return lazy_import('braces.views')
+
+
+class MessagesMixin(object):
+    @property
+    def messages(self):
+        braces = get_braces()
+        if not braces:
+            return None
+        return vars(braces.MessageMixin)['messages'].__get__(self, type(self))
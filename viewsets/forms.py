@@ -0,0 +1,10 @@
+# encoding: utf-8
+
+from django import forms
+from django.utils.translation import ugettext_lazy as _
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(label=_('File'))
+    format = forms.ChoiceField(label=_('Format'),
+                               choices=(('csv', 'CSV'), ('ndjson', 'NDJSON')))
@@ -1,18 +1,46 @@
 # encoding: utf-8
 
 import re
+from collections import Mapping, OrderedDict, namedtuple
 from itertools import chain
 
+from django.conf import settings
+from django.core.urlresolvers import NoReverseMatch, RegexURLPattern, get_script_prefix, reverse
+from django.template import loader
+from django.utils.http import urlquote
+from django.utils.regex_helper import normalize
+
 
 CAMELCASE_TO_DASH = re.compile(r'(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))')
 
 
+_mixins_cache = {}
+
+
 def make_mixin(view_class, *mixin_classes, **attrs):
+    """
+    Class based on `view_class` with `mixin_classes` ahead. Classes are
+    memoized by arguments, views share classes because viewset and other
+    parameters are passed through `as_view()`
+    """
+    key = (view_class, mixin_classes, tuple(sorted(attrs.items())))
+    try:
+        return _mixins_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # unhashable attributes values
+        key = None
+
     mixin_classes = filter(lambda Mixin: not issubclass(view_class, Mixin),
                            mixin_classes)
-    return type(view_class.__name__,
-                tuple(chain(mixin_classes, (view_class, ))),
-                attrs)
+    cls = type(view_class.__name__,
+               tuple(chain(mixin_classes, (view_class, ))),
+               attrs)
+
+    if key is not None:
+        _mixins_cache[key] = cls
+    return cls
 
 
 def camelcase_to_dash(value):
@@ -22,6 +50,35 @@ def camelcase_to_dash(value):
         strip('-')
 
 
+_templates_cache = {}
+
+
+def select_template(template_names, using=None):
+    """
+    `loader.select_template` memoized by candidate names, so loaders don't
+    stat missing candidates on every request
+    """
+    if settings.DEBUG and not autoreload_signals_available():
+        return loader.select_template(template_names, using=using)
+    key = (tuple(template_names), using)
+    template = _templates_cache.get(key)
+    if template is None:
+        template = _templates_cache[key] = loader.select_template(template_names, using=using)
+    return template
+
+
+def clear_templates_cache(**kwargs):
+    _templates_cache.clear()
+
+
+def autoreload_signals_available():
+    try:
+        from django.utils.autoreload import file_changed  # noqa
+    except ImportError:
+        return False
+    return True
+
+
 def generic_template_names(viewset, generic_name):
     opts = viewset.model_options
     args = dict(app=opts.app_label,
@@ -31,3 +88,98 @@ def generic_template_names(viewset, generic_name):
             '{app}/{generic_name}.html'.format(**args),
             '{generic_name}.html'.format(**args),
             'viewsets/{}.html'.format(generic_name), )
+
+
+class URLBuilder(object):
+    """
+    Eager replacement of `reverse()` for single route: formats arguments
+    into precompiled path, falls back to `reverse()` for invalid arguments
+    """
+    __slots__ = ('name', 'prefix', 'format', 'params', 'regex', )
+
+    # digits match most of route groups (`\d+`, `[-\w]+`)
+    SENTINEL = 1000000000
+
+    def __init__(self, name, prefix, format, params, regex):
+        self.name = name
+        self.prefix = prefix
+        self.format = format
+        self.params = params
+        self.regex = regex
+
+    @classmethod
+    def compile(cls, name, pattern):
+        """Returns builder of `pattern` reversed as `name` or `None`"""
+        candidates = normalize(pattern.regex.pattern)
+        if len(candidates) != 1:
+            return None
+        format, params = candidates[0]
+        sentinels = {param: str(cls.SENTINEL + index)
+                     for index, param in enumerate(params)}
+        try:
+            path = reverse(name, kwargs=sentinels)
+        except NoReverseMatch:
+            return None
+        suffix = format % sentinels
+        script_prefix = get_script_prefix()
+        if not path.startswith(script_prefix) or not path.endswith(suffix):
+            return None
+        prefix = path[len(script_prefix):len(path) - len(suffix)]
+        return cls(name, prefix, format, tuple(params), pattern.regex)
+
+    def __call__(self, *args, **kwargs):
+        if args:
+            if kwargs or len(args) != len(self.params):
+                # `reverse()` raises for these as for any other mismatch
+                return reverse(self.name, args=args, kwargs=kwargs)
+            kwargs = dict(zip(self.params, args))
+        if len(kwargs) == len(self.params):
+            try:
+                suffix = self.format % {key: urlquote(value)
+                                        for key, value in kwargs.items()}
+            except KeyError:
+                suffix = None
+            if suffix is not None and self.regex.match(suffix):
+                return get_script_prefix() + self.prefix + suffix
+        return reverse(self.name, kwargs=kwargs)
+
+
+Route = namedtuple('Route', ('name', 'view_class', 'view_kwargs', 'pattern', ))
+
+
+class RouteRegistry(Mapping):
+    """Frozen `name -> Route` mapping of named viewset url patterns"""
+
+    def __init__(self, patterns):
+        routes = OrderedDict()
+        for pattern in patterns:
+            if not isinstance(pattern, RegexURLPattern) or not pattern.name:
+                continue
+            view_class = getattr(pattern, 'view_class', None) or \
+                         getattr(pattern.callback, 'view_class', None)
+            routes[pattern.name] = Route(pattern.name, view_class,
+                                         getattr(pattern, 'view_kwargs', {}), pattern)
+        self._routes = routes
+
+    def __getitem__(self, name):
+        return self._routes[name]
+
+    def __iter__(self):
+        return iter(self._routes)
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __contains__(self, name):
+        return name in self._routes
+
+
+class LazyURLConf(object):
+    """URLconf module-like object which builds `viewset` patterns on access"""
+
+    def __init__(self, viewset):
+        self.viewset = viewset
+
+    @property
+    def urlpatterns(self):
+        return self.viewset.urls[0]
@@ -0,0 +1,304 @@
+# encoding: utf-8
+
+import logging
+import random
+import re
+import socket
+import sys
+import threading
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from timeit import default_timer as timer
+
+from django.db import connections
+from django.db.backends.utils import CursorDebugWrapper
+from django.template.base import Node, Template
+
+
+logger = logging.getLogger('viewsets.instrumentation')
+
+METRICS = ('wall', 'queries', 'query_time', 'template_time', 'permission_time', )
+
+
+class Measurement(object):
+    """
+    Metrics of single sampled request, times are in milliseconds. Query
+    times are collected from debug cursors which are forced for sampled
+    requests only
+    """
+
+    __slots__ = ('namespace', 'route', 'status') + METRICS + ('_started', '_query_marks', )
+
+    def __init__(self, namespace, route):
+        self.namespace = namespace
+        self.route = route
+        self.status = None
+        for name in METRICS:
+            setattr(self, name, 0)
+        self._query_marks = []
+        for connection in connections.all():
+            self._query_marks.append((connection, connection.force_debug_cursor,
+                                      len(connection.queries_log)))
+            connection.force_debug_cursor = True
+        self._started = timer()
+
+    @contextmanager
+    def measure(self, metric):
+        started = timer()
+        try:
+            yield
+        finally:
+            setattr(self, metric, getattr(self, metric) + (timer() - started) * 1000)
+
+    def finish(self, status):
+        self.wall = (timer() - self._started) * 1000
+        self.status = status
+        for connection, force_debug_cursor, mark in self._query_marks:
+            connection.force_debug_cursor = force_debug_cursor
+            queries = list(connection.queries_log)[mark:]
+            self.queries += len(queries)
+            self.query_time += sum(float(query['time']) for query in queries) * 1000
+        self._query_marks = []
+
+    def as_dict(self):
+        data = {name: getattr(self, name) for name in METRICS}
+        data.update(namespace=self.namespace, route=self.route, status=self.status)
+        return data
+
+
+class Instrumentation(object):
+    """
+    Measures `sample_rate` part of viewset requests and passes measurements
+    to every of `sinks`, shared between viewsets as class attribute
+
+        class PostViewSet(ModelViewSet):
+            instrumentation = Instrumentation([LoggingSink()], sample_rate=0.01)
+    """
+
+    def __init__(self, sinks=(), sample_rate=1.0):
+        self.sinks = list(sinks)
+        self.sample_rate = sample_rate
+
+    def start(self, namespace, route):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        return Measurement(namespace, route)
+
+    def emit(self, measurement):
+        for sink in self.sinks:
+            try:
+                sink.emit(measurement)
+            except Exception:
+                logger.exception('Instrumentation sink %r failed', sink)
+
+
+# sinks
+
+class LoggingSink(object):
+    def __init__(self, logger=logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def emit(self, measurement):
+        self.logger.log(self.level,
+                        '%s:%s %s %.1fms, %d queries %.1fms, template %.1fms, permissions %.1fms',
+                        measurement.namespace, measurement.route, measurement.status,
+                        measurement.wall, measurement.queries, measurement.query_time,
+                        measurement.template_time, measurement.permission_time)
+
+
+class AggregatorSink(object):
+    """Keeps last `size` values of every metric per route for percentiles"""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.lock = threading.Lock()
+        self.values = defaultdict(lambda: {name: deque(maxlen=self.size) for name in METRICS})
+
+    def emit(self, measurement):
+        key = (measurement.namespace, measurement.route)
+        with self.lock:
+            values = self.values[key]
+            for name in METRICS:
+                values[name].append(getattr(measurement, name))
+
+    def percentiles(self, namespace, route, metric='wall', percents=(50, 90, 99)):
+        with self.lock:
+            values = sorted(self.values.get((namespace, route), {}).get(metric, ()))
+        if not values:
+            return None
+        return {percent: values[int(round(percent / 100.0 * (len(values) - 1)))]
+                for percent in percents}
+
+    def summary(self, metric='wall', percents=(50, 90, 99)):
+        with self.lock:
+            keys = list(self.values)
+        return {'{}:{}'.format(*key): self.percentiles(key[0], key[1], metric, percents)
+                for key in keys}
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+
+
+class StatsdSink(object):
+    """
+    Sends metrics as statsd timers (queries count too, for its percentiles)
+    and status counter by UDP, lost packets and unreachable daemon are ignored
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='viewsets'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, measurement):
+        name = '.'.join(part for part in (self.prefix, measurement.namespace, measurement.route)
+                        if part)
+        lines = ['{}.{}:{:.3f}|ms'.format(name, metric, getattr(measurement, metric))
+                 for metric in METRICS]
+        lines.append('{}.status.{}:1|c'.format(name, measurement.status))
+        try:
+            self.socket.sendto('\n'.join(lines).encode('utf-8'), self.address)
+        except socket.error:
+            pass
+
+
+# query budget
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RecordingCursorWrapper(CursorDebugWrapper):
+    def __init__(self, cursor, db, recorder):
+        super(RecordingCursorWrapper, self).__init__(cursor, db)
+        self.recorder = recorder
+
+    def execute(self, sql, params=None):
+        try:
+            return super(RecordingCursorWrapper, self).execute(sql, params)
+        finally:
+            self.recorder.record(sql)
+
+    def executemany(self, sql, param_list):
+        try:
+            return super(RecordingCursorWrapper, self).executemany(sql, param_list)
+        finally:
+            self.recorder.record(sql)
+
+
+class QueryBudget(object):
+    """
+    Records SQL executed while active and reports more than `limit` queries
+    and SQL shapes repeated more than `repeat_limit` times (N+1). With
+    `origins` every query remembers serialized field or template line it
+    came from, which costs stack inspection per query
+    """
+
+    def __init__(self, name, limit, repeat_limit=5, origins=False):
+        self.name = name
+        self.limit = limit
+        self.repeat_limit = repeat_limit
+        self.origins = origins
+        self.queries = []
+        self._connections = []
+
+    def start(self):
+        for connection in connections.all():
+            self._connections.append((connection, connection.force_debug_cursor))
+            connection.force_debug_cursor = True
+            connection.make_debug_cursor = self.make_cursor_factory(connection)
+
+    def stop(self):
+        for connection, force_debug_cursor in self._connections:
+            connection.force_debug_cursor = force_debug_cursor
+            vars(connection).pop('make_debug_cursor', None)
+        self._connections = []
+
+    def make_cursor_factory(self, connection):
+        return lambda cursor: RecordingCursorWrapper(cursor, connection, self)
+
+    def record(self, sql):
+        self.queries.append((sql, get_query_origin() if self.origins else None))
+
+    def get_violations(self):
+        violations = []
+        if self.limit is not None and len(self.queries) > self.limit:
+            violations.append('{} queries, budget is {}'.format(len(self.queries), self.limit))
+
+        shapes = Counter(get_sql_shape(sql) for sql, origin in self.queries)
+        for shape, count in shapes.most_common():
+            if count <= self.repeat_limit:
+                break
+            origins = Counter(origin
+                              for sql, origin in self.queries
+                              if origin and get_sql_shape(sql) == shape)
+            violations.append('{} times: {}{}'.format(
+                count, shape,
+                ''.join('\n    from {} ({} times)'.format(origin, origin_count)
+                        for origin, origin_count in origins.most_common(3))))
+        return violations
+
+    def get_report(self):
+        violations = self.get_violations()
+        if not violations:
+            return None
+        return 'Query budget of {} exceeded:\n  {}'.format(self.name, '\n  '.join(violations))
+
+
+def get_sql_shape(sql):
+    """SQL without literals, `IN` lists of any length have same shape"""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    sql = sql.replace('%s', '?')
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', sql)
+
+
+def get_query_origin():
+    """
+    Innermost serialized field or template tag of current stack, source
+    line of first frame outside of Django otherwise
+    """
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        # `type()` doesn't evaluate lazy objects as `isinstance()` does
+        owner = frame.f_locals.get('self')
+        owner_class = type(owner)
+        if code.co_name == 'get_value' and owner_class.__name__ == 'FieldAccessor':
+            return 'field "{}"'.format(owner.name)
+        if code.co_name == 'serialize_field' and 'field' in frame.f_locals:
+            return 'field "{}"'.format(frame.f_locals['field'].name)
+        if issubclass(owner_class, Node) and getattr(owner, 'source', None):
+            return 'template {}'.format(get_node_location(owner))
+        if issubclass(owner_class, Template):
+            return 'template {}'.format(owner.name)
+        if fallback is None and not is_library_file(code.co_filename):
+            fallback = '{}:{}'.format(code.co_filename, frame.f_lineno)
+        frame = frame.f_back
+    return fallback
+
+
+_node_locations = {}
+
+
+def get_node_location(node):
+    # `source` of template nodes is set in template debug mode
+    origin, (start, end) = node.source
+    key = (origin.name, start)
+    if key not in _node_locations:
+        try:
+            line = origin.reload()[:start].count('\n') + 1
+        except Exception:
+            _node_locations[key] = origin.name
+        else:
+            _node_locations[key] = '{}:{}'.format(origin.name, line)
+    return _node_locations[key]
+
+
+def is_library_file(filename):
+    return any(part in filename
+               for part in ('/django/', '/viewsets/instrumentation.py', '/viewsets/mixins.py',
+                            '/viewsets/views.py'))
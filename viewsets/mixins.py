@@ -1,15 +1,60 @@
 # encoding: utf-8
 
+import hashlib
+import logging
 from collections import OrderedDict
-
-from django.conf.urls import url, patterns, include
-from django.core.exceptions import PermissionDenied
+from itertools import islice
+
+from django.conf import settings
+from django.conf.urls import patterns, include
+from django.core import checks, mail
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.db import connections
+from django.db.models import Count, Max, Prefetch
+from django.db.models.query import prefetch_related_objects
 from django.db.models.fields import Field
 from django.db.models.fields.related import RelatedField, ForeignKey, ManyToManyField
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
 
+from viewsets import cache
+from viewsets import compat
 from viewsets import viewset
 from viewsets import views
 from viewsets import helpers
+from viewsets import instrumentation
+from viewsets import pagination
+from viewsets import query
+
+
+logger = logging.getLogger('viewsets')
+
+
+def serialize_many_related(manager):
+    return unicode(manager.all()[:3])
+
+
+class FieldAccessor(object):
+    __slots__ = ('name', 'title', 'convert', )
+
+    def __init__(self, name, title, convert=None):
+        self.name = name
+        self.title = title
+        self.convert = convert
+
+    def get_value(self, obj):
+        value = getattr(obj, self.name)
+        if self.convert is not None:
+            value = self.convert(value)
+        return value
+
+
+class TitleAccessor(FieldAccessor):
+    """Text of object itself, as list page shows it"""
+    __slots__ = ()
+
+    def get_value(self, obj):
+        return force_text(obj)
 
 
 class NamespaceMixin(viewset.BaseViewSet):
@@ -23,13 +68,28 @@ class NamespaceMixin(viewset.BaseViewSet):
         nested = patterns('', *urls)
         return include(nested, namespace=self.get_namespace())
 
+    def get_lazy_urls(self):
+        return helpers.LazyURLConf(self), None, self.get_namespace()
+
     def reverse(self, name, *args, **kwargs):
         name = '{}:{}'.format(self.get_namespace(), name)
         return super(NamespaceMixin, self).reverse(name, *args, **kwargs)
 
+    def get_route_name(self, name):
+        return '{}:{}'.format(self.get_namespace(), name)
+
 
 class ModelMixin(viewset.BaseViewSet):
     model = None
+    # cache rendered object and list row fragments
+    fragment_cache = False
+
+    def __init__(self, **kwargs):
+        super(ModelMixin, self).__init__(**kwargs)
+        # processes which don't import URLconf (workers, commands) connect
+        # invalidation by `cache.connect_fragments_invalidation()` in `ready()`
+        if self.fragment_cache and self.model is not None:
+            cache.connect_fragments_invalidation(self.model)
 
     @property
     def model_options(self):
@@ -46,6 +106,11 @@ class ModelMixin(viewset.BaseViewSet):
             if isinstance(field, Field)
         ]
 
+    def invalidate_fragments(self, obj):
+        """Drops cached fragments of `obj`"""
+        if self.fragment_cache:
+            cache.invalidate_object(self.model, obj.pk)
+
 
 class ModelNamespaceMixin(NamespaceMixin, ModelMixin):
     def get_namespace(self):
@@ -58,16 +123,215 @@ class ModelNamespaceMixin(NamespaceMixin, ModelMixin):
 
 
 class ModelSerializeMixin(ModelMixin, viewset.BaseViewSet):
-    def serialize_object(self, obj):
-        fields = []
-
+    queryset = None
+    optimize_queryset = True
+    # field name -> `False` to skip field or `Prefetch`/lookup to use instead
+    related_lookups = {}
+    # cheap freshness sources for conditional GET (ETag/Last-Modified)
+    last_modified_field = None
+    version_field = None
+    fragment_cache_timeout = cache.FRAGMENT_TIMEOUT
+    # related objects shown for many-to-many fields, loaded for batch of
+    # objects by window functions where database supports them
+    many_related_preview = 3
+    many_related_batch_size = 100
+
+    def render_fragment(self, name, request, pk, render, *parts):
+        """
+        Returns `render()` result cached per object version, namespace,
+        language, permission fingerprint and `parts`
+        """
+        if not self.fragment_cache:
+            return render()
+        key = cache.get_fragment_key(name, self.model, pk,
+                                     request.resolver_match.namespace,
+                                     get_language(),
+                                     self.get_permission_fingerprint(request),
+                                     *parts)
+        return cache.get_fragment(key, render, self.fragment_cache_timeout)
+
+    def get_freshness(self, queryset, many=False):
+        """
+        Returns `(last_modified, version, count)` of `queryset` or `None`
+        when freshness source is not configured or object doesn't exist
+        """
+        fields = self.get_freshness_fields()
+        if not fields:
+            return
+        if many:
+            aggregates = {name: Max(name) for name in fields}
+            aggregates['_count'] = Count('pk')
+            values = queryset.aggregate(**aggregates)
+            count = values['_count']
+        else:
+            values = queryset.values(*fields).first()
+            if values is None:
+                return
+            count = 1
+        return (values.get(self.last_modified_field),
+                values.get(self.version_field),
+                count)
+
+    def get_freshness_fields(self):
+        return [name for name in (self.last_modified_field, self.version_field) if name]
+
+    def get_serialize_queryset(self, prefetch=True):
+        """
+        Queryset for serialized objects with `select_related` for foreign keys
+        and `prefetch_related` for many-to-many fields
+        """
+        queryset = self.queryset
+        if not self.optimize_queryset:
+            return queryset
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        select_related, prefetch_related = self.get_related_plan()
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related and prefetch:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def get_related_plan(self):
+        if not hasattr(self, '_related_plan'):
+            self._related_plan = self.build_related_plan()
+        return self._related_plan
+
+    def build_related_plan(self):
+        select_related, prefetch_related = [], []
         for field in self.model_options.get_fields(include_parents=False):
-            result = self.serialize_field(field, obj)
-            if not result:
+            if not isinstance(field, (ForeignKey, ManyToManyField)):
                 continue
-            fields.append(result)
+            lookup = self.related_lookups.get(field.name, field.name)
+            if lookup is False:
+                continue
+            if isinstance(field, ForeignKey) and not isinstance(lookup, Prefetch):
+                select_related.append(lookup)
+            elif lookup == field.name and self.get_preview_loader(field.name):
+                # previews are loaded apart without whole relations
+                continue
+            else:
+                prefetch_related.append(lookup)
+        return tuple(select_related), tuple(prefetch_related)
+
+    def get_preview_loader(self, name):
+        """`query.ManyRelatedPreviewLoader` of many-to-many field `name` or `None`"""
+        if not self.many_related_preview:
+            return None
+        using = self.model._default_manager.db
+        if not query.supports_window_functions(connections[using]):
+            return None
+        field = self.model_options.get_field(name)
+        if not isinstance(field, ManyToManyField):
+            return None
+        return query.ManyRelatedPreviewLoader(field, self.many_related_preview)
+
+    def get_preview_loaders(self, plan):
+        cache = self.__dict__.setdefault('_preview_loaders', {})
+        if plan not in cache:
+            loaders = {}
+            for accessor in plan:
+                if accessor.convert is serialize_many_related:
+                    loader = self.get_preview_loader(accessor.name)
+                    if loader is not None:
+                        loaders[accessor.name] = loader
+            cache[plan] = loaders
+        return cache[plan]
+
+    def load_previews(self, loaders, objects):
+        """Returns `{name: {pk: preview}}` for batch of `objects`"""
+        pks = [obj.pk for obj in objects]
+        using = self.model._default_manager.db
+        previews = {}
+        for name, loader in loaders.items():
+            previews[name] = {pk: query.format_preview(*preview)
+                              for pk, preview in loader.load(pks, using).items()}
+        return previews
+
+    _serialize_plans = {}
+
+    def get_serialize_plan(self):
+        """Compiled once per viewset class and model tuple of `FieldAccessor`"""
+        key = (type(self), self.model)
+        plan = self._serialize_plans.get(key)
+        if plan is None:
+            plan = self._serialize_plans[key] = self.build_serialize_plan()
+        return plan
+
+    def build_serialize_plan(self):
+        plan = []
+        for field in self.model_options.get_fields(include_parents=False):
+            if not isinstance(field, Field):
+                continue
+            if isinstance(field, ForeignKey):
+                convert = unicode
+            elif isinstance(field, ManyToManyField):
+                convert = serialize_many_related
+            else:
+                convert = None
+            plan.append(FieldAccessor(field.name, field.verbose_name, convert))
+        return tuple(plan)
 
-        return OrderedDict(fields)
+    def get_serialize_titles(self):
+        return [accessor.title for accessor in self.get_serialize_plan()]
+
+    def get_serialize_names(self):
+        return [accessor.name for accessor in self.get_serialize_plan()]
+
+    def serialize_object(self, obj):
+        if self._has_custom_serialize_field():
+            return self._serialize_object_by_fields(obj)
+        plan = self.get_serialize_plan()
+        row = next(self.serialize_many([obj], plan))
+        return OrderedDict(
+            (accessor.title, value)
+            for accessor, value in zip(plan, row)
+        )
+
+    def serialize_items(self, objects, plan=None):
+        """
+        Generates lists of `(name, value)` pairs, with overridden
+        `serialize_field` its fields may differ from `get_serialize_names()`
+        """
+        if plan is None and self._has_custom_serialize_field():
+            for obj in objects:
+                yield self._serialize_items_by_fields(obj)
+            return
+
+        names = [accessor.name for accessor in plan or self.get_serialize_plan()]
+        for row in self.serialize_many(objects, plan):
+            yield zip(names, row)
+
+    def serialize_many(self, objects, plan=None):
+        """
+        Generates rows of values ordered as `get_serialize_titles()`
+        or as given `plan`, fields skipped by overridden `serialize_field`
+        are `None`
+        """
+        if plan is None and self._has_custom_serialize_field():
+            names = self.get_serialize_names()
+            for obj in objects:
+                values = dict(self._serialize_items_by_fields(obj))
+                yield [values.get(name) for name in names]
+            return
+
+        plan = plan or self.get_serialize_plan()
+        loaders = self.get_preview_loaders(plan)
+        if not loaders:
+            for obj in objects:
+                yield [accessor.get_value(obj) for accessor in plan]
+            return
+
+        objects = iter(objects)
+        while True:
+            batch = list(islice(objects, self.many_related_batch_size))
+            if not batch:
+                break
+            previews = self.load_previews(loaders, batch)
+            for obj in batch:
+                yield [previews[accessor.name].get(obj.pk, u'')
+                       if accessor.name in previews else accessor.get_value(obj)
+                       for accessor in plan]
 
     def serialize_field(self, field, obj):
         if not isinstance(field, Field):
@@ -80,15 +344,55 @@ class ModelSerializeMixin(ModelMixin, viewset.BaseViewSet):
             value = unicode(value)
 
         elif isinstance(field, ManyToManyField):
-            value = unicode(value.all()[:3])
+            loader = self.get_preview_loader(field.name)
+            if loader is None:
+                value = serialize_many_related(value)
+            else:
+                value = self.load_previews({field.name: loader}, [obj])[field.name].get(obj.pk, u'')
 
         else:
             pass
 
         return title, value
 
+    def _has_custom_serialize_field(self):
+        # overridden `serialize_field` disables compiled plan
+        return type(self).serialize_field.__func__ is not \
+               ModelSerializeMixin.serialize_field.__func__
+
+    def _serialize_object_by_fields(self, obj):
+        fields = []
+
+        for field in self.model_options.get_fields(include_parents=False):
+            result = self.serialize_field(field, obj)
+            if not result:
+                continue
+            fields.append(result)
+
+        return OrderedDict(fields)
+
+    def _serialize_items_by_fields(self, obj):
+        items = []
+
+        for field in self.model_options.get_fields(include_parents=False):
+            result = self.serialize_field(field, obj)
+            if not result:
+                continue
+            items.append((field.name, result[1]))
+
+        return items
+
 
 class GuardMixin(viewset.BaseViewSet):
+    # `instrumentation.Instrumentation` instance, measures guarded views
+    instrumentation = None
+    # queries limit per route name, e.g. `{'list': 5, 'detail': 4}`
+    query_budget = {}
+    # same SQL shape executed more times within budgeted request is N+1
+    query_repeat_limit = 5
+    # exceeded budget raises instead of logging, `None` is DEBUG or test run
+    query_budget_strict = None
+
     def pre_dispatch_request(self, view, request):
         """
         View level access checking
@@ -99,10 +403,49 @@ class GuardMixin(viewset.BaseViewSet):
         Object level access checking
         """
 
+    def check_objects(self, view, request, objects):
+        """
+        Object level access checking for batch of objects
+        """
+
+    def filter_queryset(self, view, request, queryset):
+        """
+        Object level access filtering of view queryset
+        """
+        return queryset
+
+    def start_query_budget(self, view, request):
+        limit = self.query_budget.get(view.view_name)
+        if limit is None:
+            return None
+        name = '{}:{}'.format(request.resolver_match.namespace, view.view_name)
+        budget = instrumentation.QueryBudget(name, limit, self.query_repeat_limit,
+                                             origins=self.is_query_budget_strict())
+        budget.start()
+        return budget
+
+    def check_query_budget(self, view, request, budget):
+        report = budget.get_report()
+        if report is None:
+            return
+        if self.is_query_budget_strict():
+            raise instrumentation.QueryBudgetExceeded(report)
+        logger.warning(report)
+
+    def is_query_budget_strict(self):
+        if self.query_budget_strict is not None:
+            return self.query_budget_strict
+        # test runner environment replaces mail backend with `outbox`
+        return settings.DEBUG or hasattr(mail, 'outbox')
+
     def get_mixin_classes(self, view_class):
         mixin_classes = (views.DispatchViewMixin, ) + super(GuardMixin, self).get_mixin_classes(view_class)
+        if issubclass(view_class, (views.SingleObjectMixin, views.MultipleObjectMixin)):
+            mixin_classes = mixin_classes + (views.FilterQuerysetViewMixin, )
         if issubclass(view_class, views.SingleObjectMixin):
             mixin_classes = mixin_classes + (views.CheckObjectViewMixin, )
+        if issubclass(view_class, views.BulkActionMixin):
+            mixin_classes = mixin_classes + (views.CheckObjectsViewMixin, )
         return mixin_classes
 
 
@@ -122,6 +465,19 @@ class PermissionsMixin(GuardMixin, ModelMixin):
         if not self.has_object_access(view.view_name, request, obj):
             self.raise_forbidden(request, view, obj)
 
+    def filter_queryset(self, view, request, queryset):
+        queryset = super(PermissionsMixin, self).filter_queryset(view, request, queryset)
+        for checker in self.get_permission_checkers(view.view_name, request):
+            queryset = checker.filter_queryset(queryset)
+        return queryset
+
+    def check_objects(self, view, request, objects):
+        super(PermissionsMixin, self).check_objects(view, request, objects)
+        matrix = self.has_object_access_many([view.view_name], request, objects)
+        for obj, access in matrix:
+            if not access[view.view_name]:
+                self.raise_forbidden(request, view, obj)
+
     # permission denied behaviour
 
     def raise_forbidden(self, view, request, obj=None):
@@ -129,32 +485,83 @@ class PermissionsMixin(GuardMixin, ModelMixin):
 
     # permission checkers call
 
+    def get_permission_checkers(self, viewname, request):
+        """Checkers are instantiated once per viewname and memoized on `request`"""
+        cache = request.__dict__.setdefault('_viewsets_permission_checkers', {})
+        key = (id(self), viewname)
+        if key not in cache:
+            cache[key] = [checker_class(self, viewname, request)
+                          for checker_class in self.permission_check_classes]
+        return cache[key]
+
     def has_view_access(self, viewname, request):
-        for checker_class in self.permission_check_classes:
-            if not checker_class(self, viewname, request).has_view_access():
-                return False
-        return True
+        cache = request.__dict__.setdefault('_viewsets_view_access', {})
+        key = (id(self), viewname)
+        if key not in cache:
+            cache[key] = all(checker.has_view_access()
+                             for checker in self.get_permission_checkers(viewname, request))
+        return cache[key]
 
     def has_object_access(self, viewname, request, obj):
-        for checker_class in self.permission_check_classes:
-            if not checker_class(self, viewname, request).has_object_access(obj):
+        for checker in self.get_permission_checkers(viewname, request):
+            if not checker.has_object_access(obj):
                 return False
         return True
 
+    def has_object_access_many(self, viewnames, request, objects):
+        """
+        Bulk version of `has_object_access`. Returns list of
+        `(obj, {viewname: is_accessible})` pairs in order of `objects`
+        """
+        objects = list(objects)
+        matrix = [(obj, {}) for obj in objects]
+        for viewname in viewnames:
+            decisions = [True] * len(objects)
+            for checker in self.get_permission_checkers(viewname, request):
+                decisions = [decision and result
+                             for decision, result in zip(decisions, checker.has_object_access_many(objects))]
+            for (obj, access), decision in zip(matrix, decisions):
+                access[viewname] = decision
+        return matrix
+
     def has_access(self, viewname, request, obj=None):
         """Proxy-method for `has_view_access` and `has_object_access` depends on `obj`"""
         if obj:
             return self.has_object_access(viewname, request, obj)
         return self.has_view_access(viewname, request)
 
+    def get_permission_fingerprint(self, request):
+        access = [(name, self.has_view_access(name, request))
+                  for name in self.route_names]
+        return hashlib.md5(repr(access)).hexdigest()
+
 
 class ListMixin(ModelSerializeMixin):
     queryset = None
     paginate_by = 100
+    # keyset pagination on unique indexed `cursor_ordering` field
+    cursor_pagination = False
+    cursor_ordering = 'pk'
+    # `pagination.ExactCounter`, `CachedCounter` or `ApproximateCounter` instance
+    counter = pagination.ExactCounter()
+    # concrete fields shown in list, narrows list queryset with `only()`
+    list_fields = None
+    # with `list_fields` rows are `values_list()` records instead of instances
+    list_values = False
+    # list JSON has all serialized fields instead of `pk` and `title`
+    # when `list_fields` aren't set
+    list_json_all_fields = False
+    # `django_filters.FilterSet` subclass or fields for generated one
+    filterset_class = None
+    filter_fields = None
+    # fields matched with `icontains` by every word of `?q=` parameter
+    search_fields = None
+    # in DEBUG mode logs sequential scans of filtered list queries
+    explain_filters = True
 
     def collect_urls(self, *other):
         kwargs, view_class = self.build_list_view()
-        item = url('^$', view_class.as_view(**kwargs), name='list')
+        item = self.make_url('^$', view_class, kwargs, name='list')
         return super(ListMixin, self).collect_urls(item, *other)
 
     def build_list_view(self):
@@ -168,17 +575,98 @@ class ListMixin(ModelSerializeMixin):
     def get_list_kwargs(self):
         return {
             'model': self.model,
-            'queryset': self.queryset,
+            'queryset': self.get_list_queryset(),
             'paginate_by': self.paginate_by,
+            'cursor_pagination': self.cursor_pagination,
+            'cursor_ordering': self.cursor_ordering,
+            'counter': self.counter,
+            'filterset_class': self.get_filterset_class(),
+            'search_fields': self.search_fields or (),
+            'explain_filters': self.explain_filters,
         }
 
+    def get_filterset_class(self):
+        if self.filterset_class or not self.filter_fields:
+            return self.filterset_class
+        django_filters = compat.get_django_filters()
+        if not django_filters:
+            raise ImproperlyConfigured('`filter_fields` of {} requires django-filter'.format(
+                type(self).__name__))
+        meta = type(str('Meta'), (object, ), {'model': self.model,
+                                              'fields': self.filter_fields})
+        return type(str('{}FilterSet'.format(self.model.__name__)),
+                    (django_filters.FilterSet, ), {'Meta': meta})
+
+    def get_filter_lookups(self):
+        filterset_class = self.get_filterset_class()
+        if not filterset_class:
+            return []
+        return [filter_.name for filter_ in filterset_class.base_filters.values()]
+
+    def check_filter_indexes(self):
+        """Warnings for filter fields which can't be looked up by index"""
+        return [
+            checks.Warning(
+                'Filter field "{}" of {} is not indexed'.format(lookup, type(self).__name__),
+                hint='Add `db_index=True` or `index_together` to {}'.format(
+                    self.model.__name__),
+                obj=self,
+                id='viewsets.W001',
+            )
+            for lookup in self.get_filter_lookups()
+            if not query.is_indexed(self.model, lookup)
+        ]
+
+    def get_list_queryset(self):
+        if not self.list_fields:
+            # list page renders objects titles only, relations of full
+            # JSON rows are prefetched by `prefetch_list_rows()`
+            return self.get_serialize_queryset(prefetch=False)
+        queryset = self.queryset
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        if self.list_values:
+            return query.values_records(queryset, self.list_fields)
+        return queryset.only(*self.list_fields)
+
+    def prefetch_list_rows(self, objects):
+        """Page `objects` with many-to-many relations serialized in list rows"""
+        if self.list_fields or not self.list_json_all_fields or not self.optimize_queryset:
+            return objects
+        select_related, prefetch_related = self.get_related_plan()
+        objects = list(objects)
+        if prefetch_related and objects:
+            prefetch_related_objects(objects, prefetch_related)
+        return objects
+
+    def get_list_plan(self):
+        """
+        Serialize plan for list rows, restricted by `list_fields` or
+        `pk` and object title, built once per viewset
+        """
+        if not hasattr(self, '_list_plan'):
+            self._list_plan = self.build_list_plan()
+        return self._list_plan
+
+    def build_list_plan(self):
+        plan = self.get_serialize_plan()
+        if not self.list_fields:
+            if self.list_json_all_fields:
+                return plan
+            return (FieldAccessor('pk', 'pk'), TitleAccessor('title', 'title'))
+        accessors = {accessor.name: accessor for accessor in plan}
+        return (FieldAccessor('pk', 'pk'), ) + tuple(
+            accessors.get(name) or FieldAccessor(name, name)
+            for name in self.list_fields
+        )
+
 
 class DetailMixin(ModelSerializeMixin):
     queryset = None
 
     def collect_urls(self, *other):
         kwargs, view_class = self.build_detail_view()
-        item = url('^(?P<pk>\d+)/$', view_class.as_view(**kwargs), name='detail')
+        item = self.make_url('^(?P<pk>\d+)/$', view_class, kwargs, name='detail')
         return super(DetailMixin, self).collect_urls(item, *other)
 
     def build_detail_view(self):
@@ -192,7 +680,8 @@ class DetailMixin(ModelSerializeMixin):
     def get_detail_kwargs(self):
         return {
             'model': self.model,
-            'queryset': self.queryset,
+            # cached fragment doesn't need prefetched relations
+            'queryset': self.get_serialize_queryset(prefetch=not self.fragment_cache),
         }
 
 
@@ -202,17 +691,25 @@ class CreateMixin(ModelMixin, viewset.BaseViewSet):
     form_class = None
     fields = None
     prefix = None
+    import_batch_size = 500
 
     def collect_urls(self, *other):
         kwargs, view_class = self.build_create_view()
-        item = url('^add/$', view_class.as_view(**kwargs), name='add')
-        return super(CreateMixin, self).collect_urls(item, *other)
+        item = self.make_url('^add/$', view_class, kwargs, name='add')
+        kwargs, view_class = self.build_import_view()
+        import_item = self.make_url('^import/$', view_class, kwargs, name='import')
+        return super(CreateMixin, self).collect_urls(item, import_item, *other)
 
     def build_create_view(self):
         kwargs, view_class = self.wrap_view(self.get_create_class())
         kwargs.update(self.get_create_kwargs())
         return kwargs, view_class
 
+    def build_import_view(self):
+        kwargs, view_class = self.wrap_view(self.get_import_class())
+        kwargs.update(self.get_import_kwargs())
+        return kwargs, view_class
+
     def get_create_class(self):
         return views.CreateView
 
@@ -225,6 +722,18 @@ class CreateMixin(ModelMixin, viewset.BaseViewSet):
             'prefix': self.prefix,
         }
 
+    def get_import_class(self):
+        return views.ImportView
+
+    def get_import_kwargs(self):
+        return {
+            'model': self.model,
+            'queryset': self.queryset,
+            'form_class': self.form_class,
+            'fields': self.fields or self.read_write_fields,
+            'batch_size': self.import_batch_size,
+        }
+
 
 class UpdateMixin(ModelMixin, viewset.BaseViewSet):
     queryset = None
@@ -235,7 +744,7 @@ class UpdateMixin(ModelMixin, viewset.BaseViewSet):
 
     def collect_urls(self, *other):
         kwargs, view_class = self.build_update_view()
-        item = url('^(?P<pk>\d+)/edit/$', view_class.as_view(**kwargs), name='edit')
+        item = self.make_url('^(?P<pk>\d+)/edit/$', view_class, kwargs, name='edit')
         return super(UpdateMixin, self).collect_urls(item, *other)
 
     def build_update_view(self):
@@ -261,7 +770,7 @@ class DeleteMixin(ModelSerializeMixin):
 
     def collect_urls(self, *other):
         kwargs, view_class = self.build_delete_view()
-        item = url('^(?P<pk>\d+)/delete/$', view_class.as_view(**kwargs), name='delete')
+        item = self.make_url('^(?P<pk>\d+)/delete/$', view_class, kwargs, name='delete')
         return super(DeleteMixin, self).collect_urls(item, *other)
 
     def build_delete_view(self):
@@ -273,7 +782,99 @@ class DeleteMixin(ModelSerializeMixin):
         return views.DeleteView
 
     def get_delete_kwargs(self):
+        return {
+            'model': self.model,
+            # cached fragment doesn't need prefetched relations
+            'queryset': self.get_serialize_queryset(prefetch=not self.fragment_cache),
+        }
+
+
+class ExportMixin(ModelSerializeMixin):
+    export_chunk_size = 1000
+
+    def collect_urls(self, *other):
+        kwargs, view_class = self.build_export_view()
+        item = self.make_url('^export/$', view_class, kwargs, name='export')
+        return super(ExportMixin, self).collect_urls(item, *other)
+
+    def build_export_view(self):
+        kwargs, view_class = self.wrap_view(self.get_export_class())
+        kwargs.update(self.get_export_kwargs())
+        return kwargs, view_class
+
+    def get_export_class(self):
+        return views.ExportView
+
+    def get_export_kwargs(self):
+        return {
+            'model': self.model,
+            'queryset': self.get_serialize_queryset(),
+            'chunk_size': self.export_chunk_size,
+        }
+
+
+class BulkDeleteMixin(ModelMixin, viewset.BaseViewSet):
+    queryset = None
+    bulk_batch_size = 500
+    # fields allowed as exact lookups to select objects instead of `pk` list
+    bulk_filter_fields = ()
+
+    def collect_urls(self, *other):
+        kwargs, view_class = self.build_bulk_delete_view()
+        item = self.make_url('^bulk-delete/$', view_class, kwargs, name='bulk-delete')
+        return super(BulkDeleteMixin, self).collect_urls(item, *other)
+
+    def build_bulk_delete_view(self):
+        kwargs, view_class = self.wrap_view(self.get_bulk_delete_class())
+        kwargs.update(self.get_bulk_delete_kwargs())
+        return kwargs, view_class
+
+    def get_bulk_delete_class(self):
+        return views.BulkDeleteView
+
+    def get_bulk_delete_kwargs(self):
         return {
             'model': self.model,
             'queryset': self.queryset,
+            'batch_size': self.bulk_batch_size,
+            'filter_fields': self.bulk_filter_fields,
         }
+
+
+class BulkUpdateMixin(ModelMixin, viewset.BaseViewSet):
+    queryset = None
+    bulk_batch_size = 500
+    bulk_filter_fields = ()
+    # fields which can be set for all selected objects
+    bulk_fields = None
+
+    def collect_urls(self, *other):
+        kwargs, view_class = self.build_bulk_update_view()
+        item = self.make_url('^bulk-edit/$', view_class, kwargs, name='bulk-edit')
+        return super(BulkUpdateMixin, self).collect_urls(item, *other)
+
+    def build_bulk_update_view(self):
+        kwargs, view_class = self.wrap_view(self.get_bulk_update_class())
+        kwargs.update(self.get_bulk_update_kwargs())
+        return kwargs, view_class
+
+    def get_bulk_update_class(self):
+        return views.BulkUpdateView
+
+    def get_bulk_update_kwargs(self):
+        return {
+            'model': self.model,
+            'queryset': self.queryset,
+            'batch_size': self.bulk_batch_size,
+            'filter_fields': self.bulk_filter_fields,
+            'fields': self.bulk_fields or self.get_bulk_fields(),
+        }
+
+    def get_bulk_fields(self):
+        return [
+            field.name
+            for field in self.model_options.get_fields(include_parents=False)
+            if isinstance(field, Field) and field.concrete and field.editable and
+            not field.primary_key and not field.unique and
+            not isinstance(field, ManyToManyField)
+        ]
@@ -0,0 +1,286 @@
+# encoding: utf-8
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import DatabaseError, connections
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.http import Http404
+from django.utils.encoding import force_bytes, force_text
+from django.utils.translation import ugettext as _
+
+from viewsets import cache
+
+
+class CursorPage(object):
+    def __init__(self, paginator, object_list, next_cursor, previous_cursor):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator(object):
+    """
+    Keyset pagination: seeks on indexed unique `ordering` field instead of
+    `OFFSET` and never counts whole queryset
+    """
+
+    def __init__(self, queryset, per_page, ordering='pk'):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.field_name = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+
+    def page(self, cursor=None):
+        value, backward = self.decode_cursor(cursor) if cursor else (None, False)
+
+        queryset = self.queryset
+        if value is not None:
+            lookup = 'lt' if self.descending != backward else 'gt'
+            queryset = queryset.filter(**{'{}__{}'.format(self.field_name, lookup): value})
+        ordering = self.ordering
+        if backward:
+            ordering = self.field_name if self.descending else '-' + self.field_name
+        object_list = list(queryset.order_by(ordering)[:self.per_page + 1])
+
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if backward:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, value is not None
+
+        next_cursor = previous_cursor = None
+        if object_list and has_next:
+            next_cursor = self.encode_cursor(object_list[-1], False)
+        if object_list and has_previous:
+            previous_cursor = self.encode_cursor(object_list[0], True)
+        return CursorPage(self, object_list, next_cursor, previous_cursor)
+
+    def encode_cursor(self, obj, backward):
+        value = force_text(getattr(obj, self.field_name))
+        data = json.dumps([value, backward])
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            value, backward = json.loads(base64.urlsafe_b64decode(str(cursor)).decode('utf-8'))
+            value = self.clean_value(value)
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise Http404(_('Invalid cursor'))
+        return value, bool(backward)
+
+    def clean_value(self, value):
+        """Converts cursor value by ordering field, raises for foreign values"""
+        opts = self.queryset.model._meta
+        try:
+            field = opts.pk if self.field_name == 'pk' else opts.get_field(self.field_name)
+        except FieldDoesNotExist:
+            field = None
+        if field is not None:
+            value = field.to_python(value)
+        if value is None:
+            raise ValueError('Empty cursor value')
+        return value
+
+
+def iterate_batches(queryset, size, ordering='pk'):
+    """
+    Yields lists of `size` objects of whole `queryset` fetched with keyset
+    pagination, so memory usage doesn't depend on rows count. Rows of
+    yielded batch may be changed or deleted before next batch is fetched
+    """
+    paginator = CursorPaginator(queryset, size, ordering)
+    page = paginator.page()
+    while True:
+        if page.object_list:
+            yield page.object_list
+        if not page.has_next():
+            break
+        page = paginator.page(page.next_cursor)
+
+
+def iterate_chunks(queryset, size, ordering='pk'):
+    """
+    Yields objects of whole `queryset` fetched by `size` rows
+    """
+    for batch in iterate_batches(queryset, size, ordering):
+        for obj in batch:
+            yield obj
+
+
+def page_window(page, size):
+    """Page numbers around current page instead of whole `page_range`"""
+    num_pages = page.paginator.num_pages
+    first = max(1, page.number - size)
+    last = min(num_pages, page.number + size)
+    return range(first, last + 1)
+
+
+# count strategies
+
+class ExactCounter(object):
+    """`SELECT COUNT(*)` on every request"""
+
+    def count(self, view, queryset):
+        return queryset.count()
+
+    def is_approximate(self, count):
+        return False
+
+
+class CachedCounter(ExactCounter):
+    """
+    Exact count cached for `timeout` seconds per viewset, query parameters
+    and SQL, which differs for users with permission filtered querysets
+    """
+
+    ignored_params = ('page', 'cursor', )
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+
+    def count(self, view, queryset):
+        key = self.get_cache_key(view, queryset)
+        value = cache.get_cache().get(key)
+        if value is None:
+            value = super(CachedCounter, self).count(view, queryset)
+            cache.get_cache().set(key, value, self.timeout)
+        return value
+
+    def get_cache_key(self, view, queryset):
+        params = sorted((key, value)
+                        for key, values in view.request.GET.lists()
+                        if key not in self.ignored_params
+                        for value in values)
+        opts = view.viewset.model_options
+        try:
+            sql = force_text(queryset.query)
+        except EmptyResultSet:
+            sql = None
+        digest = hashlib.md5(force_bytes(repr((params, sql)))).hexdigest()
+        return cache.COUNT_KEY.format(namespace=view.request.resolver_match.namespace,
+                                      model='{}.{}'.format(opts.app_label, opts.model_name),
+                                      digest=digest)
+
+
+class ApproximateCounter(ExactCounter):
+    """
+    Counts exactly up to `cap` rows, bigger unfiltered tables are estimated
+    from database statistics and displayed as "many"
+    """
+
+    def __init__(self, cap=10000):
+        self.cap = cap
+
+    def count(self, view, queryset):
+        capped = queryset[:self.cap + 1].count()
+        if capped <= self.cap:
+            return capped
+        estimate = None
+        if not queryset.query.where:
+            estimate = self.estimate(queryset)
+        return max(estimate or 0, capped)
+
+    def is_approximate(self, count):
+        return count > self.cap
+
+    def estimate(self, queryset):
+        connection = connections[queryset.db]
+        estimator = getattr(self, 'estimate_{}'.format(connection.vendor), None)
+        if estimator is None:
+            return
+        try:
+            with connection.cursor() as cursor:
+                return estimator(cursor, queryset.model._meta.db_table)
+        except DatabaseError:
+            return
+
+    def estimate_postgresql(self, cursor, table):
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        row = cursor.fetchone()
+        return row and int(row[0])
+
+    def estimate_mysql(self, cursor, table):
+        cursor.execute('SELECT table_rows FROM information_schema.tables '
+                       'WHERE table_schema = DATABASE() AND table_name = %s', [table])
+        row = cursor.fetchone()
+        return row and int(row[0])
+
+    def estimate_sqlite(self, cursor, table):
+        # filled by `ANALYZE`, first number of `stat` is rows count
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+        row = cursor.fetchone()
+        return row and int(row[0].split()[0])
+
+
+class CountedPaginator(Paginator):
+    def __init__(self, object_list, per_page, counter=None, view=None, **kwargs):
+        super(CountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        self.counter = counter or ExactCounter()
+        self.view = view
+        self._counted = None
+
+    @property
+    def count(self):
+        if self._counted is None:
+            self._counted = self.counter.count(self.view, self.object_list)
+        return self._counted
+
+    @property
+    def is_approximate(self):
+        return self.counter.is_approximate(self.count)
+
+    def validate_number(self, number):
+        if not self.is_approximate:
+            return super(CountedPaginator, self).validate_number(number)
+        # last page is unknown, only lower bound is checked
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        if not self.is_approximate:
+            return super(CountedPaginator, self).page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return ApproximatePage(object_list[:self.per_page], number, self,
+                               has_next=len(object_list) > self.per_page)
+
+
+class ApproximatePage(Page):
+    def __init__(self, object_list, number, paginator, has_next=False):
+        super(ApproximatePage, self).__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
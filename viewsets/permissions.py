@@ -1,6 +1,10 @@
 # encoding: utf-8
 
-from django.contrib.auth import get_permission_codename
+from django.contrib.auth import get_backends, get_permission_codename
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from viewsets import cache
 
 
 class BasePermissionChecker(object):
@@ -21,30 +25,97 @@ class BasePermissionChecker(object):
         """
         return True
 
+    def has_object_access_many(self, objects):
+        """
+        Object level access checking for sequence of objects
+        """
+        return [self.has_object_access(obj) for obj in objects]
+
+    def filter_queryset(self, queryset):
+        """
+        Narrows queryset of view to accessible objects in SQL, so lists,
+        counts and object lookups skip the rest before loading
+        """
+        return queryset
+
 
 class ModelPermissionChecker(BasePermissionChecker):
-    permissions_map = {
-        'list': lambda self: True,
-        'detail': lambda self: True,
-        'add': lambda self: self._has_auth_permission('add'),
-        'edit': lambda self: self._has_auth_permission('change'),
-        'delete': lambda self: self._has_auth_permission('delete'),
+    # viewname -> auth permission action, views missing here are allowed
+    permission_actions = {
+        'add': 'add',
+        'import': 'add',
+        'edit': 'change',
+        'delete': 'delete',
+        'bulk-edit': 'change',
+        'bulk-delete': 'delete',
     }
+    # deprecated `viewname -> callable(checker)` mapping, overrides
+    # `permission_actions` when set by subclass
+    permissions_map = None
+
+    _plans = {}
+
+    @classmethod
+    def get_permission_plan(cls, viewset):
+        """
+        Resolves `viewname -> 'app_label.codename'` mapping once per
+        checker class, viewset class and model
+        """
+        key = (cls, type(viewset), viewset.model)
+        plan = cls._plans.get(key)
+        if plan is None:
+            opts = viewset.model_options
+            plan = cls._plans[key] = {
+                viewname: '{}.{}'.format(opts.app_label,
+                                         get_permission_codename(action, opts))
+                for viewname, action in cls.permission_actions.items()
+            }
+        return plan
 
     def has_view_access(self):
-        checker = self.permissions_map.get(self.viewname,
-                                           lambda _: True)
+        if self.permissions_map is not None:
+            checker = self.permissions_map.get(self.viewname, lambda _: True)
+            return super(ModelPermissionChecker, self).has_view_access() and \
+                   checker(self)
+        perm = self.get_permission_plan(self.viewset).get(self.viewname)
         return super(ModelPermissionChecker, self).has_view_access() and \
-               checker(self)
+               (perm is None or self._has_auth_permission(perm))
 
     def has_object_access(self, obj):
         return self.has_view_access()
 
-    def _has_auth_permission(self, name):
-        codename = get_permission_codename(name, self.viewset.model_options)
-        perm = '{}.{}'.format(self.viewset.model_options.app_label, codename)
-        print self.request.user, perm, self.request.user.has_perm(perm)
-        return self.request.user.has_perm(perm)
+    def has_object_access_many(self, objects):
+        return [self.has_view_access()] * len(objects)
+
+    def _has_auth_permission(self, perm):
+        if '.' not in perm:
+            # action name passed by `permissions_map` callables
+            perm = '{}.{}'.format(self.viewset.model_options.app_label,
+                                  get_permission_codename(perm, self.viewset.model_options))
+        user = self.request.user
+        if not user.is_active:
+            return False
+        if user.is_superuser:
+            return True
+        return perm in cache.get_user_permissions(user) or \
+               _has_backend_permission(user, perm)
+
+
+def _has_backend_permission(user, perm):
+    """
+    `user.has_perm()` of backends which don't answer it by
+    `get_all_permissions()`, e.g. rule based ones
+    """
+    for backend in get_backends():
+        has_perm = getattr(type(backend), 'has_perm', None)
+        if has_perm is None or has_perm.__func__ is ModelBackend.has_perm.__func__:
+            continue
+        try:
+            if backend.has_perm(user, perm):
+                return True
+        except PermissionDenied:
+            return False
+    return False
 
 
 class LoginRequiredChecker(BasePermissionChecker):
@@ -57,6 +128,9 @@ class LoginRequiredChecker(BasePermissionChecker):
     def has_object_access(self, obj):
         return self.has_view_access()
 
+    def has_object_access_many(self, objects):
+        return [self.has_view_access()] * len(objects)
+
 
 class SuperuserRequiredChecker(LoginRequiredChecker):
     def has_view_access(self):
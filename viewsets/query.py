@@ -0,0 +1,232 @@
+# encoding: utf-8
+
+import inspect
+import re
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models.query import QuerySet, prefetch_related_objects
+from django.utils.encoding import force_text, python_2_unicode_compatible
+
+
+def make_record_class(model, fields):
+    """`namedtuple` for `values_list('pk', *fields)` rows of `model`"""
+    base = namedtuple('{}Record'.format(model.__name__), ('pk', ) + tuple(fields))
+
+    @python_2_unicode_compatible
+    class Record(base):
+        __slots__ = ()
+
+        def __str__(self):
+            return u', '.join(force_text(value) for value in self[1:])
+
+    Record.__name__ = base.__name__
+    return Record
+
+
+class RecordQuerySet(object):
+    """
+    Proxy of `values_list()` queryset which yields lightweight `record`
+    instances instead of model instances
+    """
+
+    def __init__(self, queryset, record, shared=True):
+        self.queryset = queryset
+        self.record = record
+        # root proxy is shared between requests, derived ones cache rows
+        self.shared = shared
+
+    def __getattr__(self, name):
+        attr = getattr(self.queryset, name)
+        if not inspect.ismethod(attr):
+            return attr
+
+        def method(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if isinstance(result, QuerySet):
+                return RecordQuerySet(result, self.record, shared=False)
+            return result
+        return method
+
+    def __getitem__(self, key):
+        result = self.queryset[key]
+        if isinstance(key, slice):
+            if isinstance(result, QuerySet):
+                return RecordQuerySet(result, self.record, shared=False)
+            return [self.record._make(row) for row in result]
+        return self.record._make(result)
+
+    def __iter__(self):
+        queryset = self.queryset.all() if self.shared else self.queryset
+        for row in queryset:
+            yield self.record._make(row)
+
+    def __len__(self):
+        if self.shared:
+            return self.queryset.count()
+        return len(self.queryset)
+
+
+def values_records(queryset, fields):
+    record = make_record_class(queryset.model, fields)
+    return RecordQuerySet(queryset.values_list('pk', *fields), record)
+
+
+# many-to-many previews
+
+def supports_window_functions(connection):
+    if connection.vendor in ('postgresql', 'oracle'):
+        return True
+    if connection.vendor == 'sqlite':
+        import sqlite3
+        return sqlite3.sqlite_version_info >= (3, 25, 0)
+    if connection.vendor == 'mysql':
+        mariadb_version = get_mariadb_version(connection)
+        if mariadb_version is not None:
+            return mariadb_version >= (10, 2)
+        return connection.mysql_version >= (8, 0)
+    return False
+
+
+_mariadb_versions = {}
+
+
+def get_mariadb_version(connection):
+    """Version tuple of MariaDB server or `None` for MySQL, once per alias"""
+    if connection.alias not in _mariadb_versions:
+        with connection.temporary_connection():
+            server_info = connection.connection.get_server_info()
+        # e.g. "10.1.48-MariaDB" or "5.5.5-10.1.48-MariaDB-1~bionic"
+        match = re.search(r'(\d+)\.(\d+)\.(\d+)-MariaDB', server_info, re.IGNORECASE)
+        _mariadb_versions[connection.alias] = match and tuple(int(x) for x in match.groups())
+    return _mariadb_versions[connection.alias]
+
+
+class ManyRelatedPreviewLoader(object):
+    """
+    Loads first `size` related objects of many-to-many `field` and their
+    total count for batch of parents in single query with `ROW_NUMBER()`
+    and `COUNT(*)` window functions partitioned by parent
+    """
+
+    def __init__(self, field, size=3):
+        self.field = field
+        self.size = size
+
+    def get_sql(self, connection, count):
+        qn = connection.ops.quote_name
+        field = self.field
+        through = field.rel.through._meta
+        target = field.rel.to._meta
+        source_column = qn(field.m2m_column_name())
+        target_link = through.get_field(field.m2m_reverse_field_name())
+        columns = ', '.join('T.{}'.format(qn(target_field.column))
+                            for target_field in target.concrete_fields)
+        return (
+            'SELECT * FROM ('
+            'SELECT {columns}, M.{source} AS _preview_parent, '
+            'ROW_NUMBER() OVER (PARTITION BY M.{source} ORDER BY T.{target_pk}) AS _preview_row, '
+            'COUNT(*) OVER (PARTITION BY M.{source}) AS _preview_count '
+            'FROM {through} M INNER JOIN {target} T ON T.{target_key} = M.{target_column} '
+            'WHERE M.{source} IN ({placeholders})'
+            ') previews WHERE _preview_row <= %s '
+            'ORDER BY _preview_parent, _preview_row'
+        ).format(columns=columns,
+                 source=source_column,
+                 target_pk=qn(target.pk.column),
+                 through=qn(through.db_table),
+                 target=qn(target.db_table),
+                 target_key=qn(target_link.foreign_related_fields[0].column),
+                 target_column=qn(target_link.column),
+                 placeholders=', '.join(['%s'] * count))
+
+    def load(self, pks, using):
+        """Returns `{parent_pk: (objects, count)}` for parents having related objects"""
+        pks = list(pks)
+        if not pks:
+            return {}
+        connection = connections[using]
+        manager = self.field.rel.to._default_manager.db_manager(using)
+        objects = list(manager.raw(self.get_sql(connection, len(pks)), pks + [self.size]))
+        # `__str__` of related objects commonly uses their foreign keys
+        foreign_keys = [field.name
+                        for field in self.field.rel.to._meta.concrete_fields
+                        if field.is_relation]
+        if objects and foreign_keys:
+            prefetch_related_objects(objects, foreign_keys)
+
+        previews = {}
+        for obj in objects:
+            related, count = previews.setdefault(obj._preview_parent, ([], obj._preview_count))
+            related.append(obj)
+        return previews
+
+
+def format_preview(objects, count):
+    text = u', '.join(force_text(obj) for obj in objects)
+    if count > len(objects):
+        text = u'{} and {} more'.format(text, count - len(objects))
+    return text
+
+
+# query plans
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+
+def explain(queryset):
+    """Query plan rows of `queryset`, `None` for unsupported databases"""
+    connection = connections[queryset.db]
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None:
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def find_sequential_scans(queryset):
+    """Plan lines of `queryset` which read whole table instead of index lookup"""
+    plan = explain(queryset)
+    if not plan:
+        return []
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        lines = [row['QUERY PLAN'] for row in plan]
+        return [line.strip() for line in lines if 'Seq Scan' in line]
+    if vendor == 'mysql':
+        return ['{} (type ALL)'.format(row['table']) for row in plan if row.get('type') == 'ALL']
+    lines = [row['detail'] for row in plan]
+    return [line for line in lines if line.startswith('SCAN') and 'USING' not in line]
+
+
+def is_indexed(model, lookup):
+    """
+    Whether first column of some index of `model` (or of related model for
+    `related__field` lookups) is the field of `lookup`
+    """
+    opts = model._meta
+    parts = lookup.split('__')
+    field = None
+    for part in parts:
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            # lookup type, e.g. `name__icontains`
+            break
+        if not field.is_relation or part == parts[-1]:
+            break
+        opts = field.related_model._meta
+    if field is None or not field.concrete:
+        return True
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    together = list(opts.index_together) + list(opts.unique_together)
+    return any(names[0] == field.name for names in together if names)
@@ -0,0 +1,46 @@
+# encoding: utf-8
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models import signals
+from django.dispatch import receiver
+
+from viewsets import cache
+
+
+User = get_user_model()
+
+
+@receiver(signals.post_save, sender=Group)
+@receiver(signals.post_delete, sender=Group)
+@receiver(signals.post_save, sender=Permission)
+@receiver(signals.post_delete, sender=Permission)
+@receiver(signals.m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions(**kwargs):
+    cache.invalidate_permissions()
+
+
+@receiver(signals.post_save, sender=User)
+@receiver(signals.post_delete, sender=User)
+def invalidate_user_permissions(instance, **kwargs):
+    cache.invalidate_user_permissions(instance.pk)
+
+
+def invalidate_membership(instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        cache.invalidate_user_permissions(instance.pk)
+    elif pk_set:
+        for pk in pk_set:
+            cache.invalidate_user_permissions(pk)
+    else:
+        # reverse `clear()` doesn't report affected users
+        cache.invalidate_permissions()
+
+
+for field_name in ('groups', 'user_permissions'):
+    if hasattr(User, field_name):
+        signals.m2m_changed.connect(invalidate_membership,
+                                    sender=getattr(User, field_name).through,
+                                    dispatch_uid='viewsets_user_{}_changed'.format(field_name))
@@ -1,9 +1,9 @@
 # encoding: utf-8
 
 from django import template
-from django.core.urlresolvers import RegexURLPattern
+from django.utils.safestring import mark_safe
 
-from viewsets import compat, mixins
+from viewsets import compat, helpers, mixins
 
 
 register = template.Library()
@@ -11,11 +11,7 @@ register = template.Library()
 
 @register.filter
 def viewset_has(viewset, view_name):
-    for pattern in viewset.urls[0]:
-        if isinstance(pattern, RegexURLPattern):
-            if pattern.name == view_name:
-                return True
-    return False
+    return viewset.has_route(view_name)
 
 
 @register.assignment_tag(takes_context=True)
@@ -39,25 +35,56 @@ def viewset_reverse(context, *args, **kwargs):
 
     assert viewset is not None
 
-    return viewset.reverse(*args, **kwargs)
+    return viewset.build_url(*args, **kwargs)
+
+
+@register.simple_tag(takes_context=True)
+def viewset_query_string(context, **kwargs):
+    """Current query string with replaced parameters, keeps list filters in page links"""
+    params = context['request'].GET.copy()
+    for key, value in kwargs.items():
+        params[key] = value
+    return '?' + params.urlencode()
 
 
 @register.simple_tag
 def viewset_render_form(form, *args, **kwargs):
-    if compat.as_crispy_form:
-        return compat.as_crispy_form(form, *args, **kwargs)
+    as_crispy_form = compat.get_as_crispy_form()
+    if as_crispy_form:
+        return as_crispy_form(form, *args, **kwargs)
     else:
         return form.as_table()
 
 
-@register.inclusion_tag('viewsets/_object.html', takes_context=True)
+@register.simple_tag(takes_context=True)
 def viewset_render_object(context, obj):
     viewset = context.get('viewset')
+    request = context.get('request')
+
+    assert obj
+    assert viewset
+    assert isinstance(viewset, mixins.ModelSerializeMixin)
+
+    def render():
+        data = viewset.serialize_object(obj)
+        return helpers.select_template(('viewsets/_object.html', )).render({'fields': data})
+
+    return mark_safe(viewset.render_fragment('object', request, obj.pk, render))
+
+
+@register.simple_tag(takes_context=True)
+def viewset_render_row(context, obj, access):
+    viewset = context.get('viewset')
+    request = context.get('request')
 
     assert obj
     assert viewset
     assert isinstance(viewset, mixins.ModelSerializeMixin)
 
-    data = viewset.serialize_object(obj)
+    def render():
+        return helpers.select_template(('viewsets/_row.html', )).render({'viewset': viewset,
+                                                                        'object': obj,
+                                                                        'access': access})
 
-    return {'fields': data}
+    return mark_safe(viewset.render_fragment('row', request, obj.pk, render,
+                                             sorted(access.items())))
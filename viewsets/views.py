@@ -1,16 +1,50 @@
 # encoding: utf-8
 
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import operator
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer as timer
+
+from django.conf import settings
+from django.core.exceptions import NON_FIELD_ERRORS, PermissionDenied, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
+from django.forms.models import modelform_factory
+from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.encoding import force_bytes, force_text
+from django.views.decorators.http import condition
 from django.views.generic import base as base_views
 from django.views.generic.detail import SingleObjectMixin
+from django.views.generic.list import MultipleObjectMixin
 from django.views import generic as generic_views
 from django.utils.translation import ugettext_lazy as _
 
 from viewsets import compat
+from viewsets import forms
 from viewsets import helpers
+from viewsets import pagination
+from viewsets import query
+
+
+logger = logging.getLogger('viewsets')
 
 
 class GenericViewMixin(base_views.ContextMixin, generic_views.View):
     viewset = None
+    # `instrumentation.Measurement` of sampled request
+    measurement = None
+    # `instrumentation.QueryBudget` of route with queries limit
+    budget = None
+    dispatch_finished = False
 
     def get_context_data(self, **kwargs):
         kwargs['viewset'] = self.viewset
@@ -20,39 +54,337 @@ class GenericViewMixin(base_views.ContextMixin, generic_views.View):
     def view_name(self):
         return self.request.resolver_match.url_name
 
+    def dispatch(self, request, *args, **kwargs):
+        validators = None
+        if request.method in ('GET', 'HEAD'):
+            validators = self.get_validators()
+        if validators is None:
+            return super(GenericViewMixin, self).dispatch(request, *args, **kwargs)
+
+        etag, last_modified, is_private = validators
+        dispatch = condition(etag_func=lambda *args, **kwargs: etag,
+                             last_modified_func=lambda *args, **kwargs: last_modified)(
+            super(GenericViewMixin, self).dispatch)
+        response = dispatch(request, *args, **kwargs)
+        if is_private:
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ('Cookie', ))
+        return response
+
+    @contextmanager
+    def measure(self, metric):
+        if self.measurement is None:
+            yield
+        else:
+            with self.measurement.measure(metric):
+                yield
+
+    def get_validators(self):
+        """
+        Conditional GET validators `(etag, last_modified, is_private)`
+        computed before objects loading or `None`
+        """
+        return None
+
+    def make_validators(self, freshness):
+        if freshness is None:
+            return None
+        last_modified, version, count = freshness
+        fingerprint = self.viewset.get_permission_fingerprint(self.request)
+        etag = hashlib.md5(force_bytes(repr((
+            last_modified and last_modified.isoformat(),
+            version,
+            count,
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT'),
+            fingerprint,
+        )))).hexdigest()
+        return etag, last_modified, fingerprint is not None
+
 
 class DispatchViewMixin(GenericViewMixin):
     def dispatch(self, request, *args, **kwargs):
-        response = self.viewset.pre_dispatch_request(self, request)
+        instrumentation = self.viewset.instrumentation
+        if instrumentation is not None:
+            self.measurement = instrumentation.start(request.resolver_match.namespace,
+                                                     self.view_name)
+        self.budget = self.viewset.start_query_budget(self, request)
+        if self.measurement is None and self.budget is None:
+            return self.guarded_dispatch(request, *args, **kwargs)
+
+        try:
+            response = self.guarded_dispatch(request, *args, **kwargs)
+        except Exception as e:
+            self.finish_dispatch(self.get_exception_status(e), check_budget=False)
+            raise
+        if getattr(response, 'is_rendered', True):
+            self.finish_dispatch(response.status_code)
+        else:
+            # template response is rendered by handler after `dispatch()`
+            rendering_started = timer()
+
+            def rendered(response):
+                if self.measurement is not None:
+                    self.measurement.template_time += (timer() - rendering_started) * 1000
+                self.finish_dispatch(response.status_code)
+            response.add_post_render_callback(rendered)
+            self.guard_rendering(response)
+        return response
+
+    def guard_rendering(self, response):
+        """Finishes measurement and budget even when rendering of `response` raises"""
+        render = response.render
+
+        def guarded_render():
+            try:
+                return render()
+            finally:
+                # instance attribute would break pickling by cache middleware
+                del response.render
+                self.finish_dispatch(500, check_budget=False)
+        response.render = guarded_render
+
+    def guarded_dispatch(self, request, *args, **kwargs):
+        with self.measure('permission_time'):
+            response = self.viewset.pre_dispatch_request(self, request)
         if response:
             return response
         return super(DispatchViewMixin, self).dispatch(request, *args, **kwargs)
 
+    def finish_dispatch(self, status, check_budget=True):
+        # restores connections once, post-render callback goes first
+        if self.dispatch_finished:
+            return
+        self.dispatch_finished = True
+        if self.budget is not None:
+            self.budget.stop()
+        if self.measurement is not None:
+            self.measurement.finish(status)
+            self.viewset.instrumentation.emit(self.measurement)
+        if self.budget is not None and check_budget:
+            self.viewset.check_query_budget(self, self.request, self.budget)
+
+    def get_exception_status(self, exception):
+        if isinstance(exception, PermissionDenied):
+            return 403
+        if isinstance(exception, Http404):
+            return 404
+        return 500
+
+
+class FilterQuerysetViewMixin(GenericViewMixin):
+    def get_queryset(self):
+        queryset = super(FilterQuerysetViewMixin, self).get_queryset()
+        return self.viewset.filter_queryset(self, self.request, queryset)
+
 
 class CheckObjectViewMixin(SingleObjectMixin, GenericViewMixin):
     def get_object(self, queryset=None):
         obj = super(CheckObjectViewMixin, self).get_object(queryset)
-        self.viewset.check_object(self, self.request, obj)
+        with self.measure('permission_time'):
+            self.viewset.check_object(self, self.request, obj)
         return obj
 
 
-class ListView(generic_views.ListView, base_views.TemplateResponseMixin,
-               GenericViewMixin):
+class CheckObjectsViewMixin(GenericViewMixin):
+    def check_objects(self, objects):
+        super(CheckObjectsViewMixin, self).check_objects(objects)
+        with self.measure('permission_time'):
+            self.viewset.check_objects(self, self.request, objects)
+
+
+class GenericTemplateMixin(object):
+    """
+    Renders first existing of `generic_template_names`, resolved
+    template is reused between requests
+    """
+    generic_name = None
+
     def get_template_names(self):
-        return helpers.generic_template_names(self.viewset, 'list')
+        return helpers.generic_template_names(self.viewset, self.generic_name)
+
+    def render_to_response(self, context, **response_kwargs):
+        response_kwargs.setdefault('content_type', self.content_type)
+        template = helpers.select_template(self.get_template_names(),
+                                           using=self.template_engine)
+        return self.response_class(
+            request=self.request,
+            template=template,
+            context=context,
+            using=self.template_engine,
+            **response_kwargs
+        )
+
 
+class JsonResponseMixin(object):
+    """
+    Returns serialized data without template rendering for
+    `Accept: application/json` or `?format=json` requests
+    """
+    json_format_kwarg = 'format'
 
-class DetailView(generic_views.DetailView, base_views.TemplateResponseMixin,
+    def wants_json(self):
+        if not hasattr(self, '_wants_json'):
+            self._wants_json = \
+                self.request.GET.get(self.json_format_kwarg) == 'json' or \
+                'application/json' in self.request.META.get('HTTP_ACCEPT', '')
+        return self._wants_json
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.wants_json():
+            response = JsonResponse(self.get_json_data(context), safe=False)
+        else:
+            response = super(JsonResponseMixin, self).render_to_response(context, **response_kwargs)
+        patch_vary_headers(response, ('Accept', ))
+        return response
+
+    def get_json_data(self, context):
+        raise NotImplementedError()
+
+
+class ListView(JsonResponseMixin, GenericTemplateMixin,
+               generic_views.ListView, base_views.TemplateResponseMixin,
+               GenericViewMixin):
+    object_access_names = ('detail', 'edit', 'delete', )
+    cursor_pagination = False
+    cursor_ordering = 'pk'
+    cursor_kwarg = 'cursor'
+    page_window = 5
+    paginator_class = pagination.CountedPaginator
+    counter = None
+    filterset_class = None
+    search_fields = ()
+    search_kwarg = 'q'
+    explain_filters = False
+
+    generic_name = 'list'
+
+    def get_queryset(self):
+        queryset = super(ListView, self).get_queryset()
+        filtered = False
+        if self.filterset_class:
+            self.filterset = self.filterset_class(self.request.GET, queryset=queryset)
+            queryset = self.filterset.qs
+            filtered = any(self.request.GET.get(name) for name in self.filterset.filters)
+        terms = self.request.GET.get(self.search_kwarg, '').split()
+        if self.search_fields and terms:
+            queryset = queryset.filter(*[
+                reduce(operator.or_, [Q(**{'{}__icontains'.format(name): term})
+                                      for name in self.search_fields])
+                for term in terms
+            ])
+            filtered = True
+        if filtered and self.explain_filters and settings.DEBUG:
+            self.explain_queryset(queryset)
+        return queryset
+
+    def explain_queryset(self, queryset):
+        # queryset is built for validators and for rendering
+        if getattr(self, '_explained', False):
+            return
+        self._explained = True
+        for line in query.find_sequential_scans(queryset):
+            logger.warning('Sequential scan in %s: %s', self.request.path, line)
+
+    def get_validators(self):
+        # queryset isn't built twice without freshness source
+        if not self.viewset.get_freshness_fields():
+            return None
+        validators = self.make_validators(
+            self.viewset.get_freshness(self.get_queryset(), many=True))
+        if validators is None:
+            return None
+        # maximum isn't moved by deletions and permission changes, so
+        # `If-Modified-Since` alone can't be answered for lists
+        etag, last_modified, is_private = validators
+        return etag, None, is_private
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        kwargs.update(counter=self.counter, view=self)
+        return super(ListView, self).get_paginator(queryset, per_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.cursor_pagination:
+            return super(ListView, self).paginate_queryset(queryset, page_size)
+        paginator = pagination.CursorPaginator(queryset, page_size, self.cursor_ordering)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super(ListView, self).get_context_data(**kwargs)
+        if self.wants_json():
+            return context
+        context['object_access_list'] = self.get_object_access_list(context['object_list'])
+        context['filterset'] = getattr(self, 'filterset', None)
+        context['search'] = self.request.GET.get(self.search_kwarg, '')
+        if context.get('is_paginated') and not self.cursor_pagination:
+            context['page_window'] = pagination.page_window(context['page_obj'],
+                                                            self.page_window)
+        return context
+
+    def get_json_data(self, context):
+        plan = self.viewset.get_list_plan()
+        names = [accessor.name for accessor in plan]
+        objects = self.viewset.prefetch_list_rows(context['object_list'])
+        results = [OrderedDict(zip(names, row))
+                   for row in self.viewset.serialize_many(objects, plan)]
+        return OrderedDict((
+            ('pagination', self.get_json_pagination(context)),
+            ('results', results),
+        ))
+
+    def get_json_pagination(self, context):
+        page = context['page_obj']
+        if page is None:
+            return None
+        if self.cursor_pagination:
+            return OrderedDict((
+                ('next', page.next_cursor),
+                ('previous', page.previous_cursor),
+            ))
+        paginator = context['paginator']
+        return OrderedDict((
+            ('count', paginator.count),
+            ('is_approximate', paginator.is_approximate),
+            ('page', page.number),
+            ('num_pages', None if paginator.is_approximate else paginator.num_pages),
+            ('next', page.next_page_number() if page.has_next() else None),
+            ('previous', page.previous_page_number() if page.has_previous() else None),
+        ))
+
+    def get_object_access_list(self, objects):
+        viewnames = [name
+                     for name in self.object_access_names
+                     if self.viewset.has_route(name)]
+        with self.measure('permission_time'):
+            return self.viewset.has_object_access_many(viewnames, self.request, objects)
+
+
+class DetailView(JsonResponseMixin, GenericTemplateMixin,
+                 generic_views.DetailView, base_views.TemplateResponseMixin,
                  GenericViewMixin):
-    def get_template_names(self):
-        return helpers.generic_template_names(self.viewset, 'detail')
+    generic_name = 'detail'
+
+    def get_validators(self):
+        if not self.viewset.get_freshness_fields():
+            return None
+        queryset = self.get_queryset().filter(pk=self.kwargs.get(self.pk_url_kwarg))
+        return self.make_validators(
+            self.viewset.get_freshness(queryset))
+
+    def get_json_data(self, context):
+        return OrderedDict(next(self.viewset.serialize_items([context['object']])))
 
 
-class CreateView(compat.MessagesMixin,
+class CreateView(compat.MessagesMixin, GenericTemplateMixin,
                  generic_views.CreateView, base_views.TemplateResponseMixin,
                  GenericViewMixin):
-    def get_template_names(self):
-        return helpers.generic_template_names(self.viewset, 'create')
+    generic_name = 'create'
+
+    def form_valid(self, form):
+        response = super(CreateView, self).form_valid(form)
+        self.viewset.invalidate_fragments(self.object)
+        return response
 
     def get_success_url(self):
         if self.messages:
@@ -60,11 +392,133 @@ class CreateView(compat.MessagesMixin,
         return self.viewset.reverse('detail', self.object.pk)
 
 
-class UpdateView(compat.MessagesMixin,
+class ImportView(compat.MessagesMixin, JsonResponseMixin, GenericTemplateMixin,
+                 generic_views.edit.ModelFormMixin, base_views.TemplateResponseMixin,
+                 GenericViewMixin):
+    """
+    Validates every row of uploaded CSV or NDJSON file with model form and
+    inserts valid rows by `bulk_create()` of `batch_size` objects. Only
+    current batch and first `max_errors` errors are kept in memory,
+    many-to-many values aren't saved
+    """
+    generic_name = 'import'
+    object = None
+    batch_size = 500
+    max_errors = 100
+
+    def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(upload_form=forms.ImportForm()))
+
+    def post(self, request, *args, **kwargs):
+        upload_form = forms.ImportForm(request.POST, request.FILES)
+        if not upload_form.is_valid():
+            if self.wants_json():
+                return HttpResponseBadRequest(upload_form.errors.as_json(),
+                                              content_type='application/json')
+            return self.render_to_response(self.get_context_data(upload_form=upload_form))
+
+        import_format = upload_form.cleaned_data['format']
+        rows = getattr(self, 'import_{}'.format(import_format))(upload_form.cleaned_data['file'])
+        result = self.import_rows(rows)
+        if self.messages and result['created']:
+            self.messages.success(_('Created %(count)s objects') % {'count': result['created']})
+        return self.render_to_response(self.get_context_data(upload_form=forms.ImportForm(),
+                                                             result=result))
+
+    def import_rows(self, rows):
+        form_class = self.get_form_class()
+        result = {'created': 0, 'errors': [], 'errors_count': 0}
+        batch = []
+        for line, row in rows:
+            if isinstance(row, dict):
+                form = form_class(data=row)
+                if form.is_valid():
+                    batch.append((line, form.save(commit=False)))
+                    if len(batch) >= self.batch_size:
+                        self.create_batch(batch, result)
+                        batch = []
+                    continue
+                errors = form.errors
+            else:
+                errors = {NON_FIELD_ERRORS: [_('Invalid row')]}
+            self.add_row_error(result, line, errors)
+        if batch:
+            self.create_batch(batch, result)
+        return result
+
+    def add_row_error(self, result, line, errors):
+        result['errors_count'] += 1
+        if len(result['errors']) < self.max_errors:
+            result['errors'].append({
+                'line': line,
+                'errors': {name: [force_text(message) for message in messages]
+                           for name, messages in errors.items()},
+            })
+
+    def create_batch(self, batch, result):
+        """
+        Inserts `(line, obj)` pairs by single `bulk_create()`, rows violating
+        constraints (e.g. duplicated unique values within file) are
+        inserted one by one to report them as row errors
+        """
+        using = router.db_for_write(self.model)
+        try:
+            with transaction.atomic(using=using):
+                self.model._default_manager.bulk_create([obj for line, obj in batch])
+        except IntegrityError:
+            pass
+        else:
+            result['created'] += len(batch)
+            return
+
+        for line, obj in batch:
+            try:
+                with transaction.atomic(using=using):
+                    obj.save(force_insert=True)
+            except IntegrityError:
+                self.add_row_error(result, line, self.get_integrity_errors(obj))
+            else:
+                result['created'] += 1
+
+    def get_integrity_errors(self, obj):
+        # conflicting rows of same file are already inserted at this point
+        try:
+            obj.validate_unique()
+        except ValidationError as e:
+            return e.message_dict
+        return {NON_FIELD_ERRORS: [_('Row violates database constraint')]}
+
+    def import_csv(self, file):
+        # line numbers of rows with quoted line breaks are approximate
+        reader = csv.reader(file)
+        names = [force_text(name).strip() for name in next(reader, [])]
+        for line, values in enumerate(reader, 2):
+            if not any(values):
+                continue
+            yield line, dict(zip(names, [force_text(value) for value in values]))
+
+    def import_ndjson(self, file):
+        for line, data in enumerate(file, 1):
+            if not data.strip():
+                continue
+            try:
+                yield line, json.loads(force_text(data))
+            except ValueError:
+                yield line, None
+
+    def get_json_data(self, context):
+        return context.get('result') or {}
+
+
+class UpdateView(compat.MessagesMixin, GenericTemplateMixin,
                  generic_views.UpdateView, base_views.TemplateResponseMixin,
                  GenericViewMixin):
-    def get_template_names(self):
-        return helpers.generic_template_names(self.viewset, 'update')
+    generic_name = 'update'
+
+    def form_valid(self, form):
+        response = super(UpdateView, self).form_valid(form)
+        self.viewset.invalidate_fragments(self.object)
+        return response
 
     def get_success_url(self):
         if self.messages:
@@ -72,13 +526,208 @@ class UpdateView(compat.MessagesMixin,
         return self.viewset.reverse('detail', self.object.pk)
 
 
-class DeleteView(compat.MessagesMixin,
+class DeleteView(compat.MessagesMixin, GenericTemplateMixin,
                  generic_views.DeleteView, base_views.TemplateResponseMixin,
                  GenericViewMixin):
-    def get_template_names(self):
-        return helpers.generic_template_names(self.viewset, 'delete')
+    generic_name = 'delete'
 
     def get_success_url(self):
+        # called right before deletion while `pk` is still set
+        self.viewset.invalidate_fragments(self.object)
         if self.messages:
             self.messages.success(_('Deleted successful'))
         return self.viewset.reverse('list')
+
+
+class ExportView(MultipleObjectMixin, GenericViewMixin):
+    chunk_size = 1000
+    format_kwarg = 'format'
+    content_types = OrderedDict((
+        ('csv', 'text/csv; charset=utf-8'),
+        ('ndjson', 'application/x-ndjson; charset=utf-8'),
+    ))
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.format_kwarg, 'csv')
+        if export_format not in self.content_types:
+            raise Http404(_('Unknown export format'))
+
+        objects = pagination.iterate_chunks(self.get_queryset(), self.chunk_size)
+        rows = getattr(self, 'export_{}'.format(export_format))(objects)
+
+        response = StreamingHttpResponse(rows, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(
+            self.viewset.model_options.model_name, export_format)
+        return response
+
+    def export_csv(self, objects):
+        # columns are fields of first row, overridden `serialize_field`
+        # may skip fields
+        writer = csv.writer(EchoBuffer())
+        names = None
+        for items in self.viewset.serialize_items(objects):
+            if names is None:
+                names = [name for name, value in items]
+                yield writer.writerow([force_bytes(name) for name in names])
+            values = dict(items)
+            yield writer.writerow([b'' if values.get(name) is None else force_bytes(values[name])
+                                   for name in names])
+        if names is None:
+            yield writer.writerow([force_bytes(name) for name in self.viewset.get_serialize_names()])
+
+    def export_ndjson(self, objects):
+        for items in self.viewset.serialize_items(objects):
+            yield json.dumps(OrderedDict(items), cls=DjangoJSONEncoder) + '\n'
+
+
+class EchoBuffer(object):
+    """File-like object for `csv.writer` which returns written line"""
+
+    def write(self, value):
+        return value
+
+
+class BulkActionMixin(MultipleObjectMixin):
+    """
+    Applies `perform()` to objects selected by `pk` list or by exact
+    lookups of `filter_fields`. All selected objects are checked before
+    first change, then changed batch by batch in separate transactions
+    """
+    http_method_names = ['post']
+    batch_size = 500
+    filter_fields = ()
+    # lookups are posted as `filter-<name>`, apart from changed values
+    filter_prefix = 'filter-'
+    success_message = None
+
+    def post(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_target_queryset()
+        except ValidationError:
+            return HttpResponseBadRequest(_('Invalid objects selection'))
+        if queryset is None:
+            return HttpResponseBadRequest(_('Objects are not selected'))
+        form = self.get_action_form()
+        if form is not None and not form.is_valid():
+            return HttpResponseBadRequest(form.errors.as_json(), content_type='application/json')
+
+        # denied object in any batch must not leave previous batches changed
+        pks = []
+        for batch in pagination.iterate_batches(queryset, self.batch_size):
+            self.check_objects(batch)
+            pks.extend(obj.pk for obj in batch)
+
+        count = 0
+        for start in range(0, len(pks), self.batch_size):
+            batch_queryset = queryset.filter(pk__in=pks[start:start + self.batch_size])
+            try:
+                with transaction.atomic(using=queryset.db):
+                    count += self.perform(batch_queryset, list(batch_queryset), form)
+            except IntegrityError:
+                # previous batches are already committed
+                return HttpResponseBadRequest(
+                    _('Action violates database constraint after %(count)s objects') % {
+                        'count': count})
+        return self.get_success_response(count)
+
+    def get_target_queryset(self):
+        """Raises `ValidationError` for values not matching field types"""
+        queryset = self.get_queryset()
+        pks = self.request.POST.getlist('pk')
+        if pks:
+            pk_field = self.model._meta.pk
+            return queryset.filter(pk__in=[pk_field.to_python(pk) for pk in pks])
+        lookups = {}
+        for name in self.filter_fields:
+            key = self.filter_prefix + name
+            if key in self.request.POST:
+                lookups[name] = self.clean_lookup_value(name, self.request.POST[key])
+        if lookups:
+            return queryset.filter(**lookups)
+        return None
+
+    def clean_lookup_value(self, name, value):
+        if LOOKUP_SEP in name:
+            return value
+        try:
+            return self.model._meta.get_field(name).to_python(value)
+        except (TypeError, ValueError):
+            raise ValidationError(_('Invalid value'))
+
+    def get_action_form(self):
+        return None
+
+    def check_objects(self, objects):
+        pass
+
+    def perform(self, queryset, objects, form):
+        """Returns affected rows count"""
+        raise NotImplementedError()
+
+    def get_success_response(self, count):
+        if self.wants_json():
+            return JsonResponse({'count': count})
+        if self.messages:
+            self.messages.success(self.success_message % {'count': count})
+        return HttpResponseRedirect(self.viewset.reverse('list'))
+
+
+class BulkDeleteView(compat.MessagesMixin, JsonResponseMixin, BulkActionMixin, GenericViewMixin):
+    success_message = _('Deleted %(count)s objects')
+
+    def perform(self, queryset, objects, form):
+        for obj in objects:
+            self.viewset.invalidate_fragments(obj)
+        queryset.delete()
+        return len(objects)
+
+
+class BulkUpdateView(compat.MessagesMixin, JsonResponseMixin, BulkActionMixin, GenericViewMixin):
+    success_message = _('Updated %(count)s objects')
+    fields = None
+
+    def get_action_form(self):
+        form_class = modelform_factory(self.model, fields=self.fields)
+        form = form_class(data=self.request.POST)
+        # only submitted fields are changed
+        for name, field in form.fields.items():
+            if name not in self.request.POST:
+                del form.fields[name]
+        return form
+
+    def perform(self, queryset, objects, form):
+        if not form.cleaned_data:
+            return 0
+        for obj in objects:
+            self.viewset.invalidate_fragments(obj)
+        return queryset.update(**self.get_update_values(form))
+
+    def get_update_values(self, form):
+        """
+        Submitted values with `auto_now` fields and freshness sources of
+        viewset, which `update()` doesn't touch itself
+        """
+        values = dict(form.cleaned_data)
+        opts = self.model._meta
+        names = [field.name for field in opts.concrete_fields if getattr(field, 'auto_now', False)]
+        last_modified_field = getattr(self.viewset, 'last_modified_field', None)
+        if last_modified_field:
+            names.append(last_modified_field)
+        for name in names:
+            if name not in values:
+                values[name] = get_current_value(opts.get_field(name))
+        version_field = getattr(self.viewset, 'version_field', None)
+        if version_field and version_field not in values:
+            values[version_field] = F(version_field) + 1
+        return values
+
+
+def get_current_value(field):
+    """Current time value for date or time `field`, as `auto_now` sets it"""
+    if isinstance(field, models.DateTimeField):
+        return timezone.now()
+    if isinstance(field, models.DateField):
+        return datetime.date.today()
+    if isinstance(field, models.TimeField):
+        return datetime.datetime.now().time()
+    return timezone.now()
@@ -1,7 +1,7 @@
 # encoding: utf-8
 
-from django.conf.urls import patterns, include
-from django.core.urlresolvers import reverse_lazy
+from django.conf.urls import patterns, include, url
+from django.core.urlresolvers import reverse, reverse_lazy, get_urlconf
 
 from viewsets import views
 from viewsets import helpers
@@ -18,8 +18,16 @@ class BaseViewSet(object):
         return (views.GenericViewMixin, )
 
     def collect_urls(self, *other):
+        self._routes = helpers.RouteRegistry(other)
         return other
 
+    def make_url(self, regex, view_class, kwargs, name):
+        """`url()` of view which remembers view class and kwargs for `routes`"""
+        item = url(regex, view_class.as_view(**kwargs), name=name)
+        item.view_class = view_class
+        item.view_kwargs = kwargs
+        return item
+
     def wrap_view(self, view_class):
         kwargs = {'viewset': self}
         view_class = helpers.make_mixin(view_class, *self.get_mixin_classes(view_class))
@@ -30,11 +38,92 @@ class BaseViewSet(object):
         nested = patterns('', *urls)
         return include(nested)
 
+    def get_lazy_urls(self):
+        # `include()` evaluates patterns, so resolver arguments are returned as is
+        return helpers.LazyURLConf(self), None, None
+
     def reverse(self, name, *args, **kwargs):
         return reverse_lazy(name, args=args, kwargs=kwargs)
 
+    def get_route_name(self, name):
+        """Name of route for `reverse()`"""
+        return name
+
+    def build_url(self, name, *args, **kwargs):
+        """Eager `reverse` of own route through precompiled URL builder"""
+        builder = self.get_url_builders().get(name)
+        if builder is None:
+            return reverse(self.get_route_name(name), args=args, kwargs=kwargs)
+        return builder(*args, **kwargs)
+
+    def get_url_builders(self):
+        # compiled lazily, when URLconf is resolved, for each active URLconf
+        urlconf = get_urlconf()
+        builders = self.__dict__.setdefault('_url_builders', {})
+        if urlconf not in builders:
+            builders[urlconf] = self.compile_url_builders()
+        return builders[urlconf]
+
+    def compile_url_builders(self):
+        builders = {}
+        for name, route in self.routes.items():
+            builder = helpers.URLBuilder.compile(self.get_route_name(name), route.pattern)
+            if builder is not None:
+                builders[name] = builder
+        return builders
+
+    def has_route(self, name):
+        return name in self.routes
+
+    @property
+    def route_names(self):
+        return list(self.routes)
+
+    @property
+    def routes(self):
+        """Read-only mapping of route name to `helpers.Route`"""
+        if not hasattr(self, '_routes'):
+            self.urls
+        return self._routes
+
+    def get_permission_fingerprint(self, request):
+        """
+        Hash of request dependent access decisions, `None` when responses
+        don't depend on them
+        """
+        return None
+
     @property
     def urls(self):
         if not hasattr(self, '_urls'):
             self._urls = self.get_urls()
         return self._urls
+
+    @property
+    def lazy_urls(self):
+        """Same as `urls`, but views are built on first URL resolving"""
+        return self.get_lazy_urls()
+
+
+class ViewSetRouter(object):
+    """
+    Mounts viewsets by prefix, patterns of each viewset are built lazily
+
+        router = ViewSetRouter()
+        router.register('posts', PostViewSet)
+        urlpatterns = [url(r'^', include(router.urls))]
+    """
+
+    def __init__(self):
+        self.registry = []
+
+    def register(self, prefix, viewset_class, **kwargs):
+        self.registry.append((prefix, viewset_class, kwargs))
+
+    def get_urls(self):
+        return [url(r'^{}/'.format(prefix), viewset_class(**kwargs).lazy_urls)
+                for prefix, viewset_class, kwargs in self.registry]
+
+    @property
+    def urls(self):
+        return self.get_urls()